@@ -0,0 +1,201 @@
+"""Vosk recognition in a separate process, so Kaldi decoding never holds this
+interpreter's GIL.
+
+Captured int16 chunks go to the worker through a shared-memory slot ring. The
+worker runs them through a Listener and sends utterances, barge-in events and
+stage timings back over a pipe.
+"""
+
+import multiprocessing
+import struct
+from multiprocessing import shared_memory
+from listener import create_listener, PLAYBACK_NONE
+
+RING_SLOTS = 4
+SLOT_BYTES = 4000 * 2  # One 250 ms capture chunk of int16 samples
+# Payload length (or one of the markers below), then the feed() playback value
+SLOT_HEADER = struct.Struct("<ii")
+NO_AUDIO = -1  # A capture read timed out; the worker still ticks its wake timeout
+STOP = -2
+START_TIMEOUT = 120.0  # Loading a large Vosk model can take a while
+
+
+class SharedAudioRing:
+    """Fixed slots of audio in shared memory; semaphores hand them between processes.
+
+    Exactly one process writes and one reads. Each side keeps its own slot
+    index, so the only shared state is the slot contents and the two counts.
+    """
+
+    def __init__(self, slots=RING_SLOTS, slot_bytes=SLOT_BYTES):
+        self.slots = slots
+        self.slot_bytes = slot_bytes
+        self.slot_size = SLOT_HEADER.size + slot_bytes
+        self.shm = shared_memory.SharedMemory(create=True, size=slots * self.slot_size)
+        self.free = multiprocessing.Semaphore(slots)
+        self.filled = multiprocessing.Semaphore(0)
+        self._index = 0
+
+    def __getstate__(self):
+        # The worker attaches to the segment by name rather than copying it
+        state = self.__dict__.copy()
+        state["shm"] = self.shm.name
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.shm = shared_memory.SharedMemory(name=state["shm"])
+        self._index = 0
+
+    def _slot(self):
+        offset = self._index * self.slot_size
+        self._index = (self._index + 1) % self.slots
+        return offset
+
+    def write(self, data, marker=None, playback=PLAYBACK_NONE):
+        """Copies one chunk into the next free slot; blocks while the ring is full."""
+        if data is not None and len(data) > self.slot_bytes:
+            raise ValueError(
+                f"Chunk of {len(data)} bytes does not fit a {self.slot_bytes}-byte slot"
+            )
+        self.free.acquire()
+        offset = self._slot()
+        if data is None:
+            length = NO_AUDIO if marker is None else marker
+            SLOT_HEADER.pack_into(self.shm.buf, offset, length, PLAYBACK_NONE)
+        else:
+            start = offset + SLOT_HEADER.size
+            SLOT_HEADER.pack_into(self.shm.buf, offset, len(data), playback)
+            self.shm.buf[start : start + len(data)] = data
+        self.filled.release()
+
+    def read(self):
+        """Returns (the next chunk, None for NO_AUDIO, or STOP; its playback value)."""
+        self.filled.acquire()
+        offset = self._slot()
+        length, playback = SLOT_HEADER.unpack_from(self.shm.buf, offset)
+        if length < 0:
+            data = None if length == NO_AUDIO else length
+        else:
+            start = offset + SLOT_HEADER.size
+            data = bytes(self.shm.buf[start : start + length])
+        self.free.release()
+        return data, playback
+
+    def close(self, unlink=False):
+        self.shm.close()
+        if unlink:
+            self.shm.unlink()
+
+
+class _ObservationBuffer:
+    """Stands in for Metrics inside the worker; observations ride along with results."""
+
+    def __init__(self):
+        self.observations = []
+
+    def observe(self, stage, seconds):
+        self.observations.append((stage, seconds))
+
+
+def _worker_main(ring, conn, model_path, wake_word_mode, listener_options):
+    buffer = _ObservationBuffer()
+    listener = create_listener(
+        model_path, wake_word_mode, metrics=buffer, **listener_options
+    )
+    listener.on_user_speech = lambda: conn.send(("speech",))
+    conn.send(("ready",))
+
+    while True:
+        data, playback = ring.read()
+        if data == STOP:
+            break
+        utterances = listener.feed(data, playback)
+        conn.send(("done", utterances, buffer.observations))
+        buffer.observations = []
+    ring.close()
+    conn.close()
+
+
+class ASRWorker:
+    """Drop-in for Listener whose recognizers live in a worker process.
+
+    feed() hands a chunk to the worker and waits for that chunk's result. While
+    it waits this process only sits in a pipe read, so routing, the LLM client
+    and playback keep the GIL to themselves.
+    """
+
+    def __init__(
+        self,
+        model_path,
+        wake_word_mode=True,
+        metrics=None,
+        chunk_bytes=SLOT_BYTES,
+        **listener_options,
+    ):
+        self.model_path = model_path
+        self.wake_word_mode = wake_word_mode
+        # Passed on to create_listener() in the worker (early_dispatch, ...)
+        self.listener_options = listener_options
+        self.metrics = metrics
+        self.chunk_bytes = chunk_bytes  # Largest chunk feed() will be given
+        self.on_user_speech = None  # Barge-in hook, called from the feeding thread
+        self._ring = None
+        self._conn = None
+        self._process = None
+
+    def start(self):
+        """Spawns the worker and waits until its model is loaded."""
+        self._ring = SharedAudioRing(slot_bytes=self.chunk_bytes)
+        self._conn, child_conn = multiprocessing.Pipe()
+        self._process = multiprocessing.Process(
+            target=_worker_main,
+            args=(
+                self._ring,
+                child_conn,
+                self.model_path,
+                self.wake_word_mode,
+                self.listener_options,
+            ),
+            name="asr-worker",
+            daemon=True,
+        )
+        self._process.start()
+        child_conn.close()
+        if not self._conn.poll(START_TIMEOUT):
+            self.stop()
+            raise RuntimeError("ASR worker did not start in time")
+        self._receive()
+
+    def feed(self, data, playback=PLAYBACK_NONE):
+        """Sends one chunk (None after a read timeout) to the worker; returns its feed() result."""
+        self._ring.write(data, playback=playback)
+        while True:
+            message = self._receive()
+            if message[0] == "speech":
+                if self.on_user_speech is not None:
+                    self.on_user_speech()
+                continue
+            _, utterances, observations = message
+            if self.metrics is not None:
+                for stage, seconds in observations:
+                    self.metrics.observe(stage, seconds)
+            return utterances
+
+    def _receive(self):
+        try:
+            return self._conn.recv()
+        except EOFError:
+            raise RuntimeError("ASR worker exited unexpectedly") from None
+
+    def stop(self):
+        if self._process is None:
+            return
+        if self._process.is_alive():
+            self._ring.write(None, marker=STOP)
+            self._process.join(timeout=2.0)
+            if self._process.is_alive():
+                self._process.terminate()
+        self._conn.close()
+        self._ring.close(unlink=True)
+        self._process = None
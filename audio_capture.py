@@ -0,0 +1,118 @@
+import threading
+import pyaudio  # Imports PyAudio for microphone access
+
+SAMPLE_RATE = 16000
+SAMPLE_WIDTH = 2  # Bytes per paInt16 sample
+CHUNK_FRAMES = 4000  # 250 ms of audio per recognizer chunk
+RING_SECONDS = 10  # Audio kept while the recognizer thread is busy
+
+
+class RingBuffer:
+    """Fixed-size byte ring buffer filled by the PyAudio callback and drained by the recognizer."""
+
+    def __init__(self, capacity):
+        self._buf = bytearray(capacity)  # Preallocated once, never resized
+        self._capacity = capacity
+        self._read_pos = 0
+        self._size = 0
+        self._closed = False
+        self._cond = threading.Condition()
+        self.dropped = 0  # Bytes overwritten before the reader got to them
+
+    def write(self, data):
+        """Copies data into the buffer, overwriting the oldest audio when full."""
+        view = memoryview(data)
+        if len(view) > self._capacity:
+            self.dropped += len(view) - self._capacity
+            view = view[-self._capacity :]
+
+        with self._cond:
+            overflow = self._size + len(view) - self._capacity
+            if overflow > 0:
+                # Drop the oldest bytes so capture itself never blocks
+                self._read_pos = (self._read_pos + overflow) % self._capacity
+                self._size -= overflow
+                self.dropped += overflow
+
+            write_pos = (self._read_pos + self._size) % self._capacity
+            first = min(len(view), self._capacity - write_pos)
+            self._buf[write_pos : write_pos + first] = view[:first]
+            self._buf[: len(view) - first] = view[first:]
+            self._size += len(view)
+            self._cond.notify()
+
+    def read(self, size, timeout=None):
+        """Blocks until size bytes are available; returns None on timeout or close."""
+        with self._cond:
+            if not self._cond.wait_for(
+                lambda: self._size >= size or self._closed, timeout
+            ):
+                return None
+            if self._size < size:
+                return None
+
+            first = min(size, self._capacity - self._read_pos)
+            out = bytes(self._buf[self._read_pos : self._read_pos + first])
+            if first < size:
+                out += bytes(self._buf[: size - first])
+            self._read_pos = (self._read_pos + size) % self._capacity
+            self._size -= size
+            return out
+
+    def close(self):
+        """Wakes up any blocked reader so it can exit."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+
+class AudioCapture:
+    """Microphone capture in PyAudio callback mode, writing into a RingBuffer."""
+
+    def __init__(
+        self, rate=SAMPLE_RATE, chunk_frames=CHUNK_FRAMES, ring_seconds=RING_SECONDS
+    ):
+        self.rate = rate
+        self.chunk_bytes = chunk_frames * SAMPLE_WIDTH
+        self.ring = RingBuffer(rate * SAMPLE_WIDTH * ring_seconds)
+        self.overflows = 0  # Input overflows reported by PortAudio
+        self._pa = None
+        self._stream = None
+
+    def _callback(self, in_data, frame_count, time_info, status):
+        # Runs on the PortAudio thread: copy and return, nothing else
+        if status & pyaudio.paInputOverflow:
+            self.overflows += 1
+        self.ring.write(in_data)
+        return (None, pyaudio.paContinue)
+
+    def start(self):
+        """Opens the microphone stream; raises if the device cannot be opened."""
+        self._pa = pyaudio.PyAudio()
+        self._stream = self._pa.open(
+            format=pyaudio.paInt16,
+            channels=1,
+            rate=self.rate,
+            input=True,
+            frames_per_buffer=self.chunk_bytes // SAMPLE_WIDTH,
+            stream_callback=self._callback,
+        )
+        self._stream.start_stream()
+
+    def read_chunk(self, timeout=None):
+        """Returns the next recognizer-sized chunk, or None if none arrived in time."""
+        return self.ring.read(self.chunk_bytes, timeout)
+
+    def stop(self):
+        """Stops the stream and releases PyAudio."""
+        self.ring.close()
+        if self._stream is not None:
+            try:
+                self._stream.stop_stream()
+                self._stream.close()
+            except Exception:
+                pass
+            self._stream = None
+        if self._pa is not None:
+            self._pa.terminate()
+            self._pa = None
@@ -0,0 +1,110 @@
+import io
+import subprocess
+import threading
+import wave
+import pyaudio
+
+# gTTS output rate; ffmpeg resamples everything it decodes to this
+FFMPEG_DECODE_RATE = 24000
+PLAYBACK_CHUNK_FRAMES = 1024
+
+
+class PCMAudio:
+    """Raw interleaved PCM samples plus the format needed to play them."""
+
+    def __init__(self, data, rate, channels=1, width=2):
+        self.data = data
+        self.rate = rate
+        self.channels = channels
+        self.width = width  # Bytes per sample
+
+
+def decode_audio(audio, audio_format):
+    """Decodes wav, mp3 or aiff bytes into PCMAudio without touching disk."""
+    if audio_format == "wav":
+        with wave.open(io.BytesIO(audio), "rb") as wav:
+            return PCMAudio(
+                wav.readframes(wav.getnframes()),
+                wav.getframerate(),
+                wav.getnchannels(),
+                wav.getsampwidth(),
+            )
+
+    if audio_format in ("mp3", "aiff"):
+        # ffmpeg decodes from stdin to 16-bit mono PCM on stdout
+        pcm = subprocess.run(
+            [
+                "ffmpeg",
+                "-loglevel",
+                "error",
+                "-i",
+                "pipe:0",
+                "-f",
+                "s16le",
+                "-ac",
+                "1",
+                "-ar",
+                str(FFMPEG_DECODE_RATE),
+                "pipe:1",
+            ],
+            input=audio,
+            capture_output=True,
+            check=True,
+        ).stdout
+        return PCMAudio(pcm, FFMPEG_DECODE_RATE)
+
+    raise ValueError(f"Unsupported audio format: {audio_format}")
+
+
+class AudioPlayer:
+    """Plays PCMAudio on a PyAudio output stream kept open between replies."""
+
+    def __init__(self):
+        self._pa = pyaudio.PyAudio()
+        self._stream = None
+        self._format = None  # (rate, channels, width) of the open stream
+        self._lock = threading.Lock()
+
+    def _ensure_stream(self, audio):
+        fmt = (audio.rate, audio.channels, audio.width)
+        if self._stream is not None and self._format == fmt:
+            return
+        self._close_stream()
+        self._stream = self._pa.open(
+            format=self._pa.get_format_from_width(audio.width),
+            channels=audio.channels,
+            rate=audio.rate,
+            output=True,
+            frames_per_buffer=PLAYBACK_CHUNK_FRAMES,
+        )
+        self._format = fmt
+
+    def play(self, audio, interrupted=None):
+        """Blocks until audio has been written to the output device.
+
+        interrupted is an optional callable checked between chunks; playback stops
+        early (returning False) as soon as it returns True.
+        """
+        with self._lock:
+            self._ensure_stream(audio)
+            chunk_bytes = PLAYBACK_CHUNK_FRAMES * audio.channels * audio.width
+            for start in range(0, len(audio.data), chunk_bytes):
+                if interrupted is not None and interrupted():
+                    return False
+                self._stream.write(audio.data[start : start + chunk_bytes])
+            return True
+
+    def _close_stream(self):
+        if self._stream is not None:
+            try:
+                self._stream.stop_stream()
+                self._stream.close()
+            except Exception:
+                pass
+            self._stream = None
+            self._format = None
+
+    def close(self):
+        with self._lock:
+            self._close_stream()
+            self._pa.terminate()
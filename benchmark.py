@@ -0,0 +1,258 @@
+"""End-to-end voice-to-voice latency benchmark.
+
+Replays WAV files faster than real time through the same Listener the assistant
+uses (VAD, wake word, command grammar, Vosk), routes each transcript through the
+hard-command matcher, answers the rest from a local stand-in LLM server with the
+assistant's own prompt, synthesizes replies into a null audio sink and prints
+p50/p95/p99 per stage:
+
+    python benchmark.py jarvis_voice.wav --repeat 5 --tts espeak
+"""
+
+import argparse
+import time
+import wave
+import numpy as np
+from vosk import Model, SetLogLevel
+from openai import OpenAI
+from commands import commands, LENGTH_EXEMPT
+from intent_matcher import IntentMatcher
+from listener import create_listener, Utterance
+from vad import HANGOVER_CHUNKS
+from conversation import Conversation
+from llm_health import LLMHealth
+from metrics import Metrics
+from main import WAKE_WORD_MODE, EARLY_DISPATCH, NBEST_ALTERNATIVES, route_utterance
+from mock_llm_server import MockLLM, MockLLMServer
+from sentences import iter_sentences
+from tts import create_backend
+from audio_playback import decode_audio
+
+SAMPLE_RATE = 16000
+CHUNK_FRAMES = 4000  # Same chunk size the live listener feeds Kaldi
+STAGES = [
+    # Audio between the user's last voiced chunk and the utterance coming out
+    # (VAD hangover, stable-partial chunks): waited in real time when live
+    "endpoint_wait",
+    "asr_decode",  # All Listener work for one utterance: VAD, wake word, Kaldi
+    "asr_final",  # The endpointing chunk plus Result(): what the user waits for
+    "routing",
+    "llm_first_sentence",
+    "llm_total",
+    "tts",  # Synthesis and decode of the first sentence spoken
+    # endpoint_wait + asr_final + routing + llm_first_sentence + tts
+    "voice_to_voice",
+]
+
+
+def load_wav(path):
+    """Reads a 16-bit WAV and returns 16 kHz mono int16 PCM bytes."""
+    with wave.open(path, "rb") as wav:
+        if wav.getsampwidth() != 2:
+            raise ValueError(f"{path}: only 16-bit WAV files are supported")
+        channels = wav.getnchannels()
+        rate = wav.getframerate()
+        samples = np.frombuffer(wav.readframes(wav.getnframes()), dtype=np.int16)
+
+    samples = samples.reshape(-1, channels).mean(axis=1)
+    if rate != SAMPLE_RATE:
+        # Linear interpolation is plenty for recognizer benchmarking
+        n_out = int(len(samples) * SAMPLE_RATE / rate)
+        positions = np.linspace(0, len(samples) - 1, n_out)
+        samples = np.interp(positions, np.arange(len(samples)), samples)
+    return samples.astype(np.int16).tobytes()
+
+
+def transcribe(listener, pcm, timings):
+    """Feeds pcm through a Listener at full speed.
+
+    Yields (Utterance, final_seconds, endpoint_wait_seconds); the wait is in
+    audio time, from the last voiced chunk to the chunk that emitted it.
+    """
+    chunk_bytes = CHUNK_FRAMES * 2
+    # Trailing silence lets the VAD close the last segment, as a pause would live
+    pcm += bytes(chunk_bytes * (HANGOVER_CHUNKS + 1))
+    decode = 0.0
+    last_voiced = 0
+
+    for index, start in enumerate(range(0, len(pcm), chunk_bytes)):
+        speech_chunks = listener.vad.speech_chunks
+        t0 = time.perf_counter()
+        results = listener.feed(pcm[start : start + chunk_bytes])
+        t1 = time.perf_counter()
+        decode += t1 - t0
+        if listener.vad.speech_chunks > speech_chunks:
+            last_voiced = index
+
+        utterances = [r for r in results if isinstance(r, Utterance)]
+        if not utterances:
+            continue
+        timings["asr_decode"].append(decode)
+        wait = (index - last_voiced) * CHUNK_FRAMES / SAMPLE_RATE
+        for utterance in utterances:
+            yield utterance, t1 - t0, wait
+        decode = 0.0
+
+
+def spoken_reply(cmd):
+    """A hard command's reply text, without launching any application."""
+    item = commands[cmd]["responses"][0]
+    if callable(item):
+        if item.__name__.startswith("open_"):
+            return f"Opening {cmd}"
+        return item()
+    return item
+
+
+def ask_llm(client, conversation, text, timings):
+    """Streams one answer to the assistant's prompt.
+
+    Returns (first sentence, seconds to it, whole answer).
+    """
+    t0 = time.perf_counter()
+    first = None
+    first_at = None
+    sentences = []
+
+    def tokens(stream):
+        for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+    stream = client.chat.completions.create(
+        model="local-model",
+        messages=conversation.build_messages(text),
+        temperature=0.2,
+        stream=True,
+    )
+    for sentence in iter_sentences(tokens(stream)):
+        if first is None:
+            first = sentence
+            first_at = time.perf_counter() - t0
+            timings["llm_first_sentence"].append(first_at)
+        sentences.append(sentence)
+    timings["llm_total"].append(time.perf_counter() - t0)
+    return first or "", first_at or 0.0, " ".join(sentences)
+
+
+def synthesize(backend, text, timings):
+    """Synthesizes and decodes text into the null sink; returns the seconds it took."""
+    if backend is None or not text:
+        return 0.0
+    t0 = time.perf_counter()
+    decode_audio(
+        backend.synthesize(text), backend.audio_format
+    )  # Null sink: discard PCM
+    elapsed = time.perf_counter() - t0
+    timings["tts"].append(elapsed)
+    return elapsed
+
+
+def report(timings, wall):
+    print(f"\n{'stage':<20}{'n':>5}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for stage in STAGES:
+        values = timings[stage]
+        if not values:
+            print(f"{stage:<20}{0:>5}{'-':>10}{'-':>10}{'-':>10}")
+            continue
+        p50, p95, p99 = np.percentile(np.array(values) * 1000.0, [50, 95, 99])
+        print(f"{stage:<20}{len(values):>5}{p50:>10.1f}{p95:>10.1f}{p99:>10.1f}")
+    print(f"\nWall time {wall:.1f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Voice-to-voice latency benchmark")
+    parser.add_argument("wavs", nargs="*", default=["jarvis_voice.wav"])
+    parser.add_argument("--model", default="model", help="Vosk model directory")
+    parser.add_argument(
+        "--repeat", type=int, default=3, help="passes over the WAV files"
+    )
+    parser.add_argument(
+        "--llm-url", help="real OpenAI-compatible endpoint instead of the mock"
+    )
+    parser.add_argument(
+        "--ttft", type=float, default=0.3, help="mock LLM time to first token"
+    )
+    parser.add_argument(
+        "--tps", type=float, default=20.0, help="mock LLM tokens per second"
+    )
+    parser.add_argument(
+        "--no-wake-word",
+        action="store_true",
+        help="transcribe everything, as with WAKE_WORD_MODE = False",
+    )
+    parser.add_argument(
+        "--tts",
+        default="auto",
+        help="auto (the assistant's choice), a TTS backend name (pyttsx3, espeak, "
+        "gtts), or null to leave synthesis out",
+    )
+    args = parser.parse_args()
+
+    SetLogLevel(-1)
+    model = Model(args.model)
+    matcher = IntentMatcher(commands, length_exempt=LENGTH_EXEMPT)
+    if args.tts == "null":
+        backend = None
+    elif args.tts == "auto":
+        backend = create_backend()
+    else:
+        backend = create_backend([args.tts])
+
+    server = None
+    base_url = args.llm_url
+    if base_url is None:
+        server = MockLLMServer(MockLLM(ttft=args.ttft, tokens_per_sec=args.tps)).start()
+        base_url = server.base_url
+    client = OpenAI(base_url=base_url, api_key="lm-studio", max_retries=0)
+    # Same system prompt and growing history as the assistant; the response
+    # cache is bypassed so every pass reaches the LLM
+    conversation = Conversation(client, LLMHealth(client), Metrics())
+
+    audio = [(path, load_wav(path)) for path in args.wavs]
+    timings = {stage: [] for stage in STAGES}
+    start = time.perf_counter()
+    try:
+        for _ in range(args.repeat):
+            for path, pcm in audio:
+                # Fresh recognizers per file; the model is loaded once
+                listener = create_listener(
+                    model,
+                    WAKE_WORD_MODE and not args.no_wake_word,
+                    early_dispatch=EARLY_DISPATCH,
+                    max_alternatives=NBEST_ALTERNATIVES,
+                )
+                for utterance, final, wait in transcribe(listener, pcm, timings):
+                    text = utterance.text
+                    t0 = time.perf_counter()
+                    cmd, _, duplicate = route_utterance(matcher, utterance)
+                    routing = time.perf_counter() - t0
+                    if duplicate:
+                        continue  # Already answered from the partial result
+                    timings["endpoint_wait"].append(wait)
+                    timings["asr_final"].append(final)
+                    timings["routing"].append(routing)
+
+                    if cmd is not None:
+                        reply = answer = spoken_reply(cmd)
+                        thinking = 0.0
+                    else:
+                        reply, thinking, answer = ask_llm(
+                            client, conversation, text, timings
+                        )
+                    conversation.memory.add(text, answer)
+
+                    speaking = synthesize(backend, reply, timings)
+                    timings["voice_to_voice"].append(
+                        wait + final + routing + thinking + speaking
+                    )
+                    print(f"{path}: '{text}' -> {cmd or 'LLM'}")
+    finally:
+        if server is not None:
+            server.stop()
+
+    report(timings, time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    main()
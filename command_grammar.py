@@ -0,0 +1,74 @@
+import json
+import re
+
+GRAMMAR_MIN_CONF = 0.85  # Every word of a grammar hit must be at least this confident
+UNKNOWN_WORD = "[unk]"
+
+
+def normalize_phrase(phrase):
+    """Lowercases a phrase and keeps only the characters a Vosk grammar understands."""
+    phrase = re.sub(r"[^a-z' ]+", " ", phrase.lower())
+    return " ".join(phrase.split())
+
+
+class CommandGrammar:
+    """Vosk grammar compiled from the commands dictionary, with a phrase -> command lookup."""
+
+    def __init__(self, commands, extra_words=()):
+        owners = {}
+        for cmd, info in commands.items():
+            for kw in info["keywords"]:
+                phrase = normalize_phrase(kw)
+                if phrase:
+                    owners.setdefault(phrase, set()).add(cmd)
+        # A phrase listed under several intents (e.g. "what's up") is left out,
+        # so it falls through to the fuzzy router and its margin check
+        self.phrases = {
+            phrase: cmds.pop() for phrase, cmds in owners.items() if len(cmds) == 1
+        }
+
+        # Word prefixes of longer phrases: "open" while "open youtube" may follow
+        self.prefixes = set()
+        for phrase in self.phrases:
+            words = phrase.split()
+            for n in range(1, len(words)):
+                self.prefixes.add(" ".join(words[:n]))
+
+        # Words such as the wake word that may precede a command
+        self.extra_words = [normalize_phrase(w) for w in extra_words]
+        self.grammar = json.dumps(
+            list(self.phrases) + self.extra_words + [UNKNOWN_WORD]
+        )
+
+    def match(self, result):
+        """Returns (command, phrase) for a confident grammar hit in a Vosk result, else None."""
+        try:
+            words = json.loads(result).get("result", [])
+        except json.JSONDecodeError:
+            return None
+
+        # Skip leading filler the grammar may have decoded before the command
+        while words and words[0]["word"] in self.extra_words + [UNKNOWN_WORD]:
+            words = words[1:]
+        if not words:
+            return None
+
+        if min(w["conf"] for w in words) < GRAMMAR_MIN_CONF:
+            return None
+
+        phrase = " ".join(w["word"] for w in words)
+        cmd = self.phrases.get(phrase)
+        if cmd is None:
+            return None
+        return cmd, phrase
+
+    def match_partial(self, text):
+        """Returns (command, phrase) if a partial is exactly a phrase no longer one extends, else None."""
+        words = normalize_phrase(text).split()
+        while words and words[0] in self.extra_words:
+            words = words[1:]
+        phrase = " ".join(words)
+        cmd = self.phrases.get(phrase)
+        if cmd is None or phrase in self.prefixes:
+            return None
+        return cmd, phrase
@@ -0,0 +1,304 @@
+import random
+import subprocess
+import platform
+from datetime import datetime
+from rapidfuzz import fuzz  # Imports for fuzzy string matching (command comparison)
+
+# Keywords that force a direct call to the LLM, even if short
+FORCED_LLM_WORDS = [
+    "yes",
+    "no",
+    "okay",
+    "ok",
+    "yep",
+    "nope",
+    "yeah",
+    "nah",
+    "why",
+    "who",
+    "what",
+    "where",
+    "when",
+    "how",
+    "answer",
+]
+
+
+def open_app(command_list, name):
+    """Universal function to open applications based on OS."""
+    try:
+        if platform.system() == "Windows":
+            subprocess.Popen(["start"] + command_list, shell=True)
+        elif platform.system() == "Darwin":  # macOS logic
+            app_name = (
+                name
+                if name not in ["YouTube"]
+                else ("Google Chrome" if "chrome" in name.lower() else "iTunes")
+            )
+            if app_name in ["Google Chrome", "iTunes"]:
+                subprocess.Popen(["open", "-a", app_name])
+            elif command_list and command_list[0].startswith("http"):
+                subprocess.Popen(["open", command_list[0]])
+            else:
+                subprocess.Popen(command_list)
+        else:
+            subprocess.Popen(command_list)  # Generic Linux/other
+        return f"Opening {name}"
+    except Exception:
+        return f"Could not open {name}"
+
+
+def open_chrome():
+    return open_app(["chrome"], "Google Chrome")
+
+
+def open_youtube():
+    return open_app(["https://www.youtube.com"], "YouTube")
+
+
+def open_itunes():
+    return open_app(["itunes"], "iTunes")
+
+
+# --- Hardcoded Commands Dictionary ---
+
+commands = {
+    "time": {
+        "keywords": [
+            "time",
+            "what time",
+            "what time is it",
+            "current time",
+            "tell me the time",
+            "whats the time",
+            "time right now",
+            "what is the time now",
+            "do you know the time",
+            "what's the current hour",
+            "check the clock",
+            "the time please",
+            "what hour is it",
+            "exact time now",
+            "time check",
+        ],
+        "responses": [
+            lambda: f"The time is {datetime.now().strftime('%I:%M %p')}",
+            lambda: f"Right now it's {datetime.now().strftime('%I:%M %p')}",
+            lambda: f"It's currently {datetime.now().strftime('%I:%M %p')}",
+            lambda: f"The current time is {datetime.now().strftime('%I:%M %p')}",
+        ],
+    },
+    "date": {
+        "keywords": [
+            "date",
+            "what's the date",
+            "today's date",
+            "whats the date today",
+            "tell me the date",
+            "current date",
+            "what day is it",
+            "what day is today",
+            "what is today's date",
+            "can you tell me the date",
+            "date check",
+            "what day of the week",
+            "the date today",
+        ],
+        "responses": [
+            lambda: f"Today is {datetime.now().strftime('%B %d, %Y')}",
+            lambda: f"The date today is {datetime.now().strftime('%B %d, %Y')}",
+            lambda: f"It's {datetime.now().strftime('%B %d, %Y')} today",
+            lambda: f"Today's date is {datetime.now().strftime('%A, %B %d, %Y')}",
+        ],
+    },
+    "how_are_you": {
+        "keywords": [
+            "how are you",
+            "how's it going",
+            "how do you feel",
+            "whats up",
+            "what's up",
+            "how you doing",
+            "how are things",
+            "how ya doing",
+            "you good",
+            "how's your day",
+            "what are you up to",
+            "how do you function",
+            "tell me how you feel",
+        ],
+        "responses": [
+            "I'm just a bunch of code, but I'm running perfectly!",
+            "Feeling operational! Thanks for asking.",
+            "All systems go. How can I assist you today?",
+            "Fantastic! Ready to help you!",
+            "I'm doing great, thanks for asking!",
+        ],
+    },
+    "joke": {
+        "keywords": [
+            "tell me a joke",
+            "joke",
+            "make me laugh",
+            "say something funny",
+            "I need a joke",
+            "got any jokes",
+            "tell a joke please",
+            "amuse me",
+            "crack a joke",
+            "say a funny thing",
+            "tell me a funny story",
+            "I'm bored tell a joke",
+            "make me chuckle",
+        ],
+        "responses": [
+            "Why did the computer go to the doctor? Because it caught a virus!",
+            "Why do programmers prefer dark mode? Because light attracts bugs!",
+            "I would tell you a UDP joke, but you might not get it.",
+            "Why do Java developers wear glasses? Because they can't C sharp!",
+            "How many programmers does it take to change a light bulb? None, that's a hardware problem!",
+        ],
+    },
+    "thanks": {
+        "keywords": [
+            "thank you",
+            "thanks",
+            "thx",
+            "thank you so much",
+            "thanks a lot",
+            "appreciate it",
+            "much appreciated",
+            "cheers",
+            "you're the best",
+            "thanks jarvis",
+            "good job",
+            "nice one",
+            "i thank you",
+            "i am grateful",
+            "many thanks",
+            "apology",
+            "i'm sorry",
+            "i am sorry",
+            "sorry",
+        ],
+        "responses": [
+            "You're welcome!",
+            "No problem, happy to help!",
+            "Anytime, my friend.",
+            "My pleasure!",
+            "Glad I could assist!",
+            "Understood, apology accepted.",
+        ],
+    },
+    "hello": {
+        "keywords": [
+            "hello",
+            "hi",
+            "hey",
+            "hi there",
+            "greetings",
+            "hello jarvis",
+            "hey there",
+            "good day",
+            "howdy",
+            "what's up",
+            "hey assistant",
+            "good evening",
+            "good afternoon",
+            "morning",
+            "afternoon",
+            "good morning",
+            "top of the morning",
+            "good morning to you",
+        ],
+        "responses": [
+            "Hello! How can I help you today?",
+            "Hi there! Great to see you!",
+            "Hey! What's on your mind?",
+            "Greetings! Ready to assist!",
+            "Hi! What can I do for you?",
+            "Good morning! Ready for a productive day?",
+        ],
+    },
+    "chrome": {
+        "keywords": [
+            "open chrome",
+            "launch chrome",
+            "start chrome",
+            "chrome",
+            "google",
+            "open browser",
+            "start the browser",
+            "launch google chrome",
+            "open google",
+            "can you open chrome",
+        ],
+        "responses": [open_chrome],  # Calls the function to open the app
+    },
+    "youtube": {
+        "keywords": [
+            "open youtube",
+            "youtube",
+            "launch youtube",
+            "start youtube",
+            "open videos",
+            "youtube videos",
+            "access youtube",
+            "go to youtube",
+            "launch the youtube website",
+        ],
+        "responses": [open_youtube],  # Calls the function to open the URL
+    },
+    "itunes": {
+        "keywords": [
+            "open itunes",
+            "itunes",
+            "launch itunes",
+            "start itunes",
+            "music",
+            "play music",
+            "open my music app",
+            "launch apple music",
+            "start apple music",
+            "can you open itunes",
+        ],
+        "responses": [open_itunes],  # Calls the function to open the app
+    },
+    "shut down": {
+        "keywords": [
+            "shut down",
+            "stop",
+            "turn off",
+            "exit",
+            "quit",
+            "terminate",
+            "end program",
+            "close jarvis",
+            "stop listening",
+            "exit application",
+            "i'm done",
+            "goodbye and shut down",
+        ],
+        "responses": ["Shutting down. Goodbye!"],
+    },
+}
+
+
+# App launchers match even on keywords much shorter than the utterance
+LENGTH_EXEMPT = ["chrome", "youtube", "itunes"]
+
+
+def is_forced_llm(text):
+    """True for short conversational replies ("yes", "why") that must go to the LLM."""
+    if len(text.split()) > 2:
+        return False
+    return any(fuzz.ratio(text, word) > 90 for word in FORCED_LLM_WORDS)
+
+
+def command_response(cmd):
+    """Picks one of the command's responses, calling it if it is an action."""
+    raw_resp = commands[cmd]["responses"]
+    if isinstance(raw_resp, list):
+        item = random.choice(raw_resp)
+        return item() if callable(item) else item
+    return raw_resp() if callable(raw_resp) else ""
@@ -0,0 +1,209 @@
+import time
+import requests
+from sentences import iter_sentences  # Cuts streamed LLM output at sentence ends
+from memory import ConversationMemory  # Token-budgeted chat history
+from response_cache import ResponseCache, normalize_query  # Reuses repeated answers
+from prompt_stats import PromptCacheStats  # Prefill time saved by prefix caching
+
+# Spoken straight away while the LLM endpoint is down; synthesized at startup
+LLM_OFFLINE_APOLOGY = "My apologies, sir. My language core is offline at the moment."
+
+# System prompt defines Jarvis's persona and response rules. It must stay
+# byte-identical across turns so the server can reuse its cached prefix.
+SYSTEM_PROMPT = (
+    "You are Jarvis, Tony Stark's witty and superior AI assistant. "
+    "Your responses must be in English. Answer in full sentences, but be **extremely concise** and **avoid any excessive politeness, introductions, or verbose filler phrases**. "
+    "Answer all questions using your internal knowledge. Do not mention external search or real-time data needs. "
+    "Maintain factual accuracy. Respond directly to the user's input with a touch of Jarvis's dry humor. "
+    "Messages may start with a bracketed note about the last internal operation; use it as context only."
+)
+
+
+class Conversation:
+    """Chat state shared by the pipeline stages: history, last operation and LLM access."""
+
+    def __init__(self, client, llm_health, metrics):
+        self.client = client
+        self.llm_health = llm_health
+        self.metrics = metrics
+        # Recent turns within a prompt token budget; older ones become a summary
+        self.memory = ConversationMemory()
+        # Answers to repeated questions, keyed by normalized transcript + context
+        self.response_cache = ResponseCache()
+        self.prompt_stats = PromptCacheStats()
+        self.last_operation = "None recorded."
+
+    def build_messages(self, user_text):
+        """Builds the chat messages: fixed persona, conversation history, then context plus query."""
+        history_messages = []
+        if self.memory.summary:
+            # Alternating roles keep strict chat templates (e.g. Gemma) happy
+            history_messages.append(
+                {
+                    "role": "user",
+                    "content": f"[Summary of our earlier conversation: {self.memory.summary}]",
+                }
+            )
+            history_messages.append({"role": "assistant", "content": "Noted."})
+
+        # Prepare history for LLM context
+        for turn in self.memory.turns:
+            user_message = turn["user"]
+            jarvis_message = (
+                turn["jarvis"]
+                .replace(" sir.", "")
+                .replace(" sir!", "")
+                .replace(" sir?", "")
+            )
+
+            history_messages.append({"role": "user", "content": user_message})
+            history_messages.append({"role": "assistant", "content": jarvis_message})
+
+        # Volatile context goes last so it never invalidates the cached prefix
+        user_message = f"[Last internal operation: {self.last_operation}]\n{user_text}"
+
+        messages = [{"role": "system", "content": SYSTEM_PROMPT}]
+        messages.extend(history_messages)
+        messages.append({"role": "user", "content": user_message})
+        return messages
+
+    def _context(self):
+        # Everything a context-dependent answer may draw on, the prompt's
+        # last-operation note included
+        return " ".join(
+            [self.memory.summary]
+            + [f"{t['user']} {t['jarvis']}" for t in self.memory.turns[-2:]]
+            + [self.last_operation]
+        )
+
+    def cache_key(self, user_text):
+        """Response cache key and TTL for a query in the current conversation context."""
+        return self.response_cache.key(user_text, self._context())
+
+    def prompt_key(self, user_text):
+        """Equal keys mean a query would be asked the same way in the same context."""
+        return normalize_query(user_text), self._context(), self.last_operation
+
+    def remember_answer(self, user_text, response):
+        """Records an LLM answer as the last operation and in the response cache."""
+        key, ttl = self.cache_key(user_text)
+        self.last_operation = f"LLM Query: {user_text}, LLM Response: {response}"
+        self.response_cache.put(key, response, ttl)
+
+    def summarize_turns(self, summary, turns):
+        """Asks the LLM to fold evicted turns into the running conversation summary."""
+        transcript = "\n".join(
+            f"User: {turn['user']}\nJarvis: {turn['jarvis']}" for turn in turns
+        )
+        try:
+            completion = self.client.chat.completions.create(
+                model="local-model",
+                messages=[
+                    {
+                        "role": "user",
+                        "content": (
+                            "Update the summary of a conversation between a user and Jarvis. "
+                            "Keep names, facts and open requests; drop small talk. "
+                            "Answer with the new summary only, at most 80 words.\n\n"
+                            f"Current summary: {summary or 'None.'}\n\n"
+                            f"New turns:\n{transcript}"
+                        ),
+                    }
+                ],
+                temperature=0.0,
+                timeout=30,
+            )
+        except Exception as e:
+            self.llm_health.record_failure(e)
+            raise
+        self.llm_health.record_success()
+        return completion.choices[0].message.content
+
+    def has_cached_answer(self, user_text):
+        return self.cache_key(user_text)[0] in self.response_cache
+
+    def cached_answer(self, user_text):
+        """Returns the cached answer to a query, recording it as the last operation."""
+        key, _ = self.cache_key(user_text)
+        cached = self.response_cache.get(key)
+        if cached is not None:
+            print(f"...Answered from response cache ({self.response_cache.stats()})...")
+            self.last_operation = f"LLM Query: {user_text}, LLM Response: {cached}"
+        return cached
+
+    def stream_answer(self, user_text, cancelled=None):
+        """Streams the LLM answer sentence by sentence without changing any chat state.
+
+        The generator returns the full answer, or None if the request failed or
+        the optional cancelled event was set while it streamed.
+        """
+        # Usage/timings arrive on the final chunk when the server reports them
+        final = {}
+
+        def tokens(stream):
+            try:
+                for chunk in stream:
+                    if cancelled is not None and cancelled.is_set():
+                        return
+                    if chunk.usage is not None:
+                        final["usage"] = chunk.usage
+                    if getattr(chunk, "timings", None) is not None:
+                        final["timings"] = chunk.timings
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        yield chunk.choices[0].delta.content
+            finally:
+                # Also runs when the caller closes us early; frees the server
+                # from generating the rest
+                stream.close()
+
+        if not self.llm_health.allow_request():
+            yield LLM_OFFLINE_APOLOGY
+            return None
+
+        sentences = []
+        start = time.monotonic()
+        try:
+            stream = self.client.chat.completions.create(
+                model="local-model",
+                messages=self.build_messages(user_text),
+                temperature=0.2,
+                timeout=15,
+                stream=True,
+                stream_options={"include_usage": True},
+            )
+            for sentence in iter_sentences(tokens(stream)):
+                if not sentences:
+                    self.metrics.observe("llm_first_sentence", time.monotonic() - start)
+                sentences.append(sentence)
+                yield sentence
+            if cancelled is not None and cancelled.is_set():
+                return None
+            self.metrics.observe("llm_total", time.monotonic() - start)
+            self.llm_health.record_success()
+            print(self.prompt_stats.record(final.get("usage"), final.get("timings")))
+
+        except requests.exceptions.Timeout as e:
+            self.llm_health.record_failure(e)
+            yield "Sir, the network operation timed out while waiting for a response from the LLM."
+            return None
+        except Exception as e:
+            self.llm_health.record_failure(e)
+            yield f"Sir, I seem to have lost connection to the mainframe. Error: {e}"
+            return None
+
+        return " ".join(sentences) or None
+
+    def ask_llm_stream(self, user_text, cancelled=None):
+        """Streams the LLM answer and yields it one sentence at a time as tokens arrive.
+
+        Setting the optional cancelled event stops the stream; an answer cut
+        short that way is not cached.
+        """
+        cached = self.cached_answer(user_text)
+        if cached is not None:
+            yield from iter_sentences([cached])
+            return
+
+        final_response = yield from self.stream_answer(user_text, cancelled)
+        if final_response:
+            self.remember_answer(user_text, final_response)
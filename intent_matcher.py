@@ -0,0 +1,201 @@
+import math
+import re
+from collections import defaultdict
+import numpy as np
+from rapidfuzz import fuzz, process  # Batched fuzzy scoring (command comparison)
+
+NGRAM = 3
+MIN_SHARED_NGRAMS = 0.3  # Share of the shorter string's trigrams a candidate must have
+MATCH_RATIO = 85  # fuzz.ratio needed for a match
+MATCH_PARTIAL = 98  # ... or fuzz.partial_ratio
+MIN_LENGTH_RATIO = 0.5  # Keywords this much shorter than the text need a ratio of 90
+STRICT_RATIO = 90
+PARTIAL_WEIGHT = 0.9  # A full substring hit ranks like a ratio of 90
+MIN_MARGIN = 5.0  # Two matching intents closer than this are ambiguous
+TOP_K = 3
+# N-best alternatives: Vosk confidences are lattice scores, so weights come from
+# a softmax over their differences; a gap of this much costs a factor of e
+CONFIDENCE_TEMPERATURE = 10.0
+MIN_ALTERNATIVE_WEIGHT = 0.2  # Lighter alternatives add score but cannot make a hit
+
+
+def tokenize(text):
+    return re.findall(r"\w+", text)
+
+
+def ngrams(text):
+    return {text[i : i + NGRAM] for i in range(len(text) - NGRAM + 1)}
+
+
+def confidence_weights(confidences, temperature=CONFIDENCE_TEMPERATURE):
+    """Normalized weights for N-best confidences, best hypothesis heaviest."""
+    confidences = np.asarray(confidences, dtype=float)
+    weights = np.exp((confidences - confidences.max()) / temperature)
+    return weights / weights.sum()
+
+
+class IntentMatch:
+    """Routing outcome for one text: the top-k intents, their scores and the margin."""
+
+    def __init__(self, top, hit, second_hit):
+        self.top = top  # [(command, score), ...] best first
+        best = top[0][1] if top else 0.0
+        second = top[1][1] if len(top) > 1 else 0.0
+        self.margin = best - second
+        # Only a second intent that also matched can make the winner ambiguous
+        self.ambiguous = hit and second_hit and self.margin < MIN_MARGIN
+        self.command = top[0][0] if hit and not self.ambiguous else None
+        self.score = best
+
+    def describe(self):
+        return ", ".join(f"{cmd}={score:.0f}" for cmd, score in self.top)
+
+
+class IntentMatcher:
+    """Fuzzy keyword -> command router with the keyword index built once at startup."""
+
+    def __init__(self, commands, length_exempt=()):
+        # Flat keyword table; ids follow dictionary order
+        self.keywords = []
+        self.intents = list(commands)
+        intent_ids = []
+        length_checked = []
+        self.keyword_ngrams = []
+
+        self.token_index = defaultdict(set)  # token -> keyword ids
+        self.ngram_index = defaultdict(set)  # trigram -> keyword ids
+        self.short_ids = set()  # Keywords too short to have a trigram
+
+        for intent_id, (cmd, info) in enumerate(commands.items()):
+            for kw in info["keywords"]:
+                kw_id = len(self.keywords)
+                kw = kw.lower()
+                self.keywords.append(kw)
+                intent_ids.append(intent_id)
+                length_checked.append(cmd not in length_exempt)
+
+                for token in tokenize(kw):
+                    self.token_index[token].add(kw_id)
+
+                grams = ngrams(kw)
+                self.keyword_ngrams.append(len(grams))
+                if not grams:
+                    self.short_ids.add(kw_id)
+                for gram in grams:
+                    self.ngram_index[gram].add(kw_id)
+
+        # Per-keyword arrays used by the vectorized length check
+        self.keyword_lengths = np.array([len(kw) for kw in self.keywords])
+        self.length_checked = np.array(length_checked, dtype=bool)
+        self.intent_ids = np.array(intent_ids, dtype=np.intp)
+
+    def candidates(self, text):
+        """Returns the ids of keywords worth scoring against text, in keyword order."""
+        text_ngrams = ngrams(text)
+        if not text_ngrams:
+            # Too short to prune on; partial_ratio can still hit almost anything
+            return range(len(self.keywords))
+
+        found = set(self.short_ids)
+        for token in tokenize(text):
+            found |= self.token_index.get(token, set())
+
+        shared = defaultdict(int)
+        for gram in text_ngrams:
+            for kw_id in self.ngram_index.get(gram, ()):
+                shared[kw_id] += 1
+
+        for kw_id, count in shared.items():
+            needed = MIN_SHARED_NGRAMS * min(
+                len(text_ngrams), self.keyword_ngrams[kw_id]
+            )
+            if count >= max(1, math.ceil(needed)):
+                found.add(kw_id)
+
+        return sorted(found)
+
+    def score(self, texts):
+        """Scores every text against the union of their candidate keywords in one batch.
+
+        Returns (keyword ids, score matrix, hit mask); matrices are
+        len(texts) x len(keyword ids).
+        """
+        ids = set()
+        for text in texts:
+            ids.update(self.candidates(text))
+        ids = np.array(sorted(ids), dtype=np.intp)
+        choices = [self.keywords[i] for i in ids]
+
+        # One C-level call per scorer for the whole texts x keywords matrix
+        ratio = process.cdist(texts, choices, scorer=fuzz.ratio)
+        partial = process.cdist(texts, choices, scorer=fuzz.partial_ratio)
+
+        # Skip keywords much shorter than the input to avoid false positives
+        text_lengths = np.array([max(len(t), 1) for t in texts])
+        length_ratio = self.keyword_lengths[ids] / text_lengths[:, None]
+        too_short = (
+            self.length_checked[ids]
+            & (length_ratio < MIN_LENGTH_RATIO)
+            & (ratio < STRICT_RATIO)
+        )
+
+        hits = ~too_short & ((ratio > MATCH_RATIO) | (partial > MATCH_PARTIAL))
+        scores = np.where(too_short, 0.0, np.maximum(ratio, partial * PARTIAL_WEIGHT))
+        return ids, scores, hits
+
+    def route_batch(self, texts, k=TOP_K):
+        """Ranks all intents for each text in one pass; returns an IntentMatch per text."""
+        if not texts:
+            return []
+
+        ids, scores, hits = self.score(texts)
+        owners = self.intent_ids[ids]
+        return [
+            self._rank(*self._per_intent(owners, row_scores, row_hits), k)
+            for row_scores, row_hits in zip(scores, hits)
+        ]
+
+    def route_alternatives(self, alternatives, k=TOP_K):
+        """Ranks all intents over N-best (text, confidence) alternatives in one batch.
+
+        Each intent's score is the confidence-weighted mean of its score in every
+        alternative, so a command misheard in the top hypothesis can still win
+        through the runners-up. Only alternatives with real weight can make a hit,
+        and only if the weighted score still clears the single-text hit level.
+        """
+        texts = [text for text, _ in alternatives]
+        weights = confidence_weights([conf for _, conf in alternatives])
+
+        ids, scores, hits = self.score(texts)
+        owners = self.intent_ids[ids]
+        intent_scores = np.zeros(len(self.intents))
+        intent_hits = np.zeros(len(self.intents), dtype=bool)
+        for weight, row_scores, row_hits in zip(weights, scores, hits):
+            row_intent_scores, row_intent_hits = self._per_intent(
+                owners, row_scores, row_hits
+            )
+            intent_scores += weight * row_intent_scores
+            if weight >= MIN_ALTERNATIVE_WEIGHT:
+                intent_hits |= row_intent_hits
+        # A lone runner-up must not carry a command the other hypotheses disagree with
+        intent_hits &= intent_scores > MATCH_RATIO
+        return self._rank(intent_scores, intent_hits, k)
+
+    def _per_intent(self, owners, row_scores, row_hits):
+        # Best keyword score and whether any keyword matched, per intent
+        intent_scores = np.zeros(len(self.intents))
+        intent_hits = np.zeros(len(self.intents), dtype=bool)
+        np.maximum.at(intent_scores, owners, row_scores)
+        np.logical_or.at(intent_hits, owners, row_hits)
+        return intent_scores, intent_hits
+
+    def _rank(self, intent_scores, intent_hits, k):
+        # Stable sort: equal scores keep commands dict order
+        order = np.argsort(-intent_scores, kind="stable")[:k]
+        top = [(self.intents[i], float(intent_scores[i])) for i in order]
+        second_hit = len(order) > 1 and bool(intent_hits[order[1]])
+        return IntentMatch(top, bool(intent_hits[order[0]]), second_hit)
+
+    def route(self, text, k=TOP_K):
+        """Ranks all intents for text; see route_batch."""
+        return self.route_batch([text], k)[0]
@@ -0,0 +1,461 @@
+import json
+import time
+from collections import deque
+from vosk import Model, KaldiRecognizer
+from commands import commands
+from command_grammar import CommandGrammar, normalize_phrase
+from vad import VoiceActivityDetector
+
+WAKE_WORD = "jarvis"
+WAKE_BUFFER_CHUNKS = 12  # Audio (3 s) handed to the full recognizer on wake
+AWAKE_TIMEOUT = 8.0  # Seconds without speech or a command before going back to sleep
+BARGE_IN_MIN_WORDS = 2  # Words in a partial that mean the user talks over Jarvis
+# Energy barge-in during playback: chunks this far above the learned echo level
+# count as the user talking over Jarvis
+BARGE_IN_ECHO_MARGIN_DB = 6.0
+ECHO_LEARN_CHUNKS = 4  # Playback chunks measured before the energy trigger arms
+ECHO_ADAPT = 0.2  # Echo level tracking rate
+EARLY_STABLE_CHUNKS = 2  # Chunks a partial must stay unchanged before early dispatch
+SAMPLE_RATE = 16000
+SAMPLE_WIDTH = 2
+
+# What Jarvis was doing while a chunk was captured; see feed() and playback_state()
+PLAYBACK_NONE = 0
+PLAYBACK_SPEECH = 1  # Speaking: only the wake word gets through, as a barge-in
+PLAYBACK_WAKE_WORD = 2  # Saying the wake word itself: nothing gets through
+
+
+def playback_state(now_playing):
+    """Playback value for feed(), given the text Jarvis is playing (None if silent)."""
+    if now_playing is None:
+        return PLAYBACK_NONE
+    if WAKE_WORD in normalize_phrase(now_playing).split():
+        return PLAYBACK_WAKE_WORD
+    return PLAYBACK_SPEECH
+
+
+def parse_alternatives(result):
+    """Returns [(text, confidence), ...] best first from a plain or N-best Vosk result."""
+    parsed = json.loads(result)
+    alternatives = parsed.get("alternatives")
+    if alternatives is None:
+        return [(parsed.get("text", "").lower(), 1.0)]
+    return [
+        (alt.get("text", "").lower(), float(alt.get("confidence", 0.0)))
+        for alt in alternatives
+    ]
+
+
+class Utterance:
+    """A final transcript, with the command already resolved when the grammar fast path hit."""
+
+    def __init__(
+        self,
+        text,
+        command=None,
+        early=False,
+        alternatives=None,
+        early_command=None,
+        heard_at=None,
+    ):
+        self.text = text
+        self.command = command
+        self.early = early  # Dispatched from a stable partial, before endpointing
+        # Command already dispatched early from this utterance's partial result;
+        # the router drops the final if it resolves to the same one
+        self.early_command = early_command
+        # N-best [(text, confidence), ...] with text first, when there are several
+        self.alternatives = alternatives or []
+        # Monotonic time the user stopped speaking; starts the voice-to-voice span
+        self.heard_at = time.monotonic() if heard_at is None else heard_at
+
+
+class StablePartial:
+    """A partial transcript that has stopped changing; a hint to start work early."""
+
+    def __init__(self, text):
+        self.text = text
+
+
+class Listener:
+    """ASR stage: runs captured audio through Vosk and returns final transcripts."""
+
+    def __init__(
+        self,
+        recognizer,
+        vad=None,
+        wake_recognizer=None,
+        command_grammar=None,
+        grammar_recognizer=None,
+        on_user_speech=None,
+        barge_in_on_energy=False,
+        early_dispatch=False,
+        speculate_after=None,
+        metrics=None,
+    ):
+        self.recognizer = recognizer
+        self.vad = vad  # Optional VoiceActivityDetector gating the recognizer
+        # Optional grammar recognizer that only knows the wake word; when set,
+        # the full recognizer sleeps until it fires
+        self.wake_recognizer = wake_recognizer
+        # Optional CommandGrammar plus the constrained recognizer running it,
+        # fed the same audio as the open-vocabulary recognizer
+        self.command_grammar = command_grammar
+        self.grammar_recognizer = grammar_recognizer
+        # Barge-in hook, called from the ASR thread whenever new user speech shows up:
+        # the wake word, a non-trivial partial result, or (optionally) energy:
+        # VAD onset while Jarvis is quiet, or speech clearly louder than its
+        # echo while it talks (needs vad)
+        self.on_user_speech = on_user_speech
+        self.barge_in_on_energy = barge_in_on_energy and vad is not None
+        # Fire exact command phrases from stable partial results (needs command_grammar)
+        self.early_dispatch = early_dispatch and command_grammar is not None
+        # Seconds of audio a partial must stay unchanged before a StablePartial
+        # is returned for it; None disables the hint
+        self.speculate_after = speculate_after
+        self.metrics = metrics  # Optional Metrics timing Kaldi decode and parsing
+        self._awake = wake_recognizer is None
+        self._awake_since = 0.0
+        self._playback = PLAYBACK_NONE  # Jarvis's state when this chunk was captured
+        # The user interrupted playback; their audio gets through until it ends
+        self._barged_in = False
+        self._echo_db = None  # Level of Jarvis's own voice as the microphone hears it
+        self._echo_chunks = 0
+        self._wake_buffer = deque(maxlen=WAKE_BUFFER_CHUNKS)
+        # When the last voiced chunk was fed: the end of the user's speech, as
+        # opposed to the later moment Kaldi or the VAD endpointed it
+        self._last_voiced_at = time.monotonic()
+        self._emitted = []  # Utterances produced by the current feed() call
+        self._last_partial = ""
+        self._stable_chunks = 0
+        self._stable_seconds = 0.0
+        self._announced = False  # StablePartial already returned for this partial
+        # (command, phrase) already dispatched early; a final result for the
+        # same command is dropped
+        self._dispatched = None
+
+    def feed(self, data, playback=PLAYBACK_NONE):
+        """Runs one captured chunk (None after a read timeout) through the recognizers.
+
+        playback is a PLAYBACK_* value telling whether Jarvis's own speech may
+        be in the chunk; such audio only reaches the wake-word spotter, and
+        never triggers barge-in otherwise. Blocking; returns the Utterances
+        completed by this chunk.
+        """
+        if self._awake and self.wake_recognizer is not None:
+            if time.monotonic() - self._awake_since > AWAKE_TIMEOUT:
+                self._sleep()
+        self._playback = playback
+        if not playback:
+            self._barged_in = False  # Playback is over; the next reply is muted again
+        if data is not None:
+            self._process(data)
+        emitted, self._emitted = self._emitted, []
+        return emitted
+
+    def _process(self, data):
+        if self.vad is None:
+            self._last_voiced_at = time.monotonic()  # Every chunk counts without a VAD
+            self._accept(data)
+            return
+
+        # Only speech (plus pre-roll and hangover) reaches Kaldi
+        was_active = self.vad.active
+        speech_chunks = self.vad.speech_chunks
+        chunks, segment_ended = self.vad.process(data)
+        if self.vad.speech_chunks > speech_chunks:
+            self._last_voiced_at = time.monotonic()
+        if self.vad.active:
+            # A long request is still going; the timeout counts from its last word
+            self._awake_since = time.monotonic()
+        if self.barge_in_on_energy:
+            self._check_energy(self.vad.active and not was_active)
+        for chunk in chunks:
+            self._accept(chunk)
+        if segment_ended:
+            self._flush()
+
+    def _check_energy(self, onset):
+        if not self._playback:
+            if onset:
+                self._user_speech()
+            return
+        if self._barged_in:
+            return
+        level = self.vad.level_db
+        if (
+            self._echo_chunks >= ECHO_LEARN_CHUNKS
+            and level > self._echo_db + BARGE_IN_ECHO_MARGIN_DB
+        ):
+            # Louder than Jarvis's echo: the user; let their audio through
+            self._barged_in = True
+            self._user_speech()
+            return
+        # Still just the echo; the level is kept across replies
+        if self._echo_db is None:
+            self._echo_db = level
+        else:
+            self._echo_db += ECHO_ADAPT * (level - self._echo_db)
+        self._echo_chunks += 1
+
+    def _accept(self, data):
+        if not self._awake:
+            self._spot_wake_word(data)
+            return
+        if self._playback and not self._barged_in:
+            return  # Don't transcribe Jarvis's own replies back as user speech
+
+        if self.grammar_recognizer is not None:
+            if self.grammar_recognizer.AcceptWaveform(data):
+                if self._emit_command(self.grammar_recognizer.Result()):
+                    # Command already dispatched; drop the open-vocabulary decode
+                    self.recognizer.Reset()
+                    return
+
+        start = time.monotonic()
+        endpoint = self.recognizer.AcceptWaveform(data)
+        self._observe("asr_chunk", start)
+        if endpoint:
+            self._emit(self.recognizer.Result())
+        elif (
+            self.on_user_speech is not None
+            or self.early_dispatch
+            or self.speculate_after is not None
+            or self.wake_recognizer is not None
+        ):
+            partial = json.loads(self.recognizer.PartialResult()).get("partial", "")
+            self._check_partial(partial, len(data) / (SAMPLE_RATE * SAMPLE_WIDTH))
+
+    def _check_partial(self, partial, seconds):
+        if partial != self._last_partial:
+            self._awake_since = time.monotonic()  # New words keep the listener awake
+            # Only new words count as talking over Jarvis, and never the tail of
+            # a command that was dispatched early and is being answered
+            if (
+                not self._playback
+                and self._dispatched is None
+                and len(partial.split()) >= BARGE_IN_MIN_WORDS
+            ):
+                self._user_speech()
+            self._last_partial = partial
+            self._stable_chunks = 1
+            self._stable_seconds = seconds
+            self._announced = False
+            return
+        self._stable_chunks += 1
+        self._stable_seconds += seconds
+
+        if (
+            self.speculate_after is not None
+            and not self._announced
+            and self._dispatched is None
+            and self._stable_seconds >= self.speculate_after
+        ):
+            text = self._strip_wake_word(partial)
+            if text:
+                self._announced = True
+                self._emitted.append(StablePartial(text))
+
+        if not self.early_dispatch or self._dispatched is not None:
+            return
+        if self._stable_chunks < EARLY_STABLE_CHUNKS:
+            return
+
+        hit = self.command_grammar.match_partial(partial)
+        if hit is None:
+            return
+        # The final result still arrives; it is only used if it says something else
+        self._dispatched = hit
+        cmd, phrase = hit
+        self._emitted.append(self._utterance(phrase, command=cmd, early=True))
+
+    def _utterance(self, text, early=False, **kwargs):
+        # Timed from the end of the user's speech rather than from recognition
+        if not early:
+            self._observe("endpointing", self._last_voiced_at)
+        return Utterance(text, early=early, heard_at=self._last_voiced_at, **kwargs)
+
+    def _observe(self, stage, start):
+        if self.metrics is not None:
+            self.metrics.observe(stage, time.monotonic() - start)
+
+    def _user_speech(self):
+        if self.on_user_speech is not None:
+            self.on_user_speech()
+
+    def _flush(self):
+        # Speech segment over: close out whichever recognizer is listening
+        if self._awake:
+            self._emit(self.recognizer.FinalResult())
+        else:
+            self.wake_recognizer.Reset()
+            self._wake_buffer.clear()
+
+    def _spot_wake_word(self, data):
+        if self._playback == PLAYBACK_WAKE_WORD:
+            # Jarvis is saying the wake word; hearing it would interrupt itself
+            self.wake_recognizer.Reset()
+            self._wake_buffer.clear()
+            return
+        self._wake_buffer.append(data)
+        if self.wake_recognizer.AcceptWaveform(data):
+            heard = json.loads(self.wake_recognizer.Result()).get("text", "")
+        else:
+            heard = json.loads(self.wake_recognizer.PartialResult()).get("partial", "")
+
+        if WAKE_WORD not in heard.split():
+            return
+
+        self._user_speech()
+        self.wake_recognizer.Reset()
+        self.recognizer.Reset()
+        self._awake = True
+        self._awake_since = time.monotonic()
+        # Barge-in: playback is being cut, so the request that follows gets through
+        self._barged_in = self._playback != PLAYBACK_NONE
+
+        # Replay the buffered audio so "jarvis, open youtube" works in one breath.
+        # During playback the buffer holds Jarvis's voice; keep just this chunk.
+        buffered = [data] if self._barged_in else list(self._wake_buffer)
+        self._wake_buffer.clear()
+        for chunk in buffered:
+            self._accept(chunk)
+
+    def _reset_partial(self):
+        self._last_partial = ""
+        self._stable_chunks = 0
+        self._stable_seconds = 0.0
+        self._announced = False
+        self._dispatched = None
+
+    def _strip_wake_word(self, text):
+        words = text.split()
+        if self.wake_recognizer is not None and WAKE_WORD in words[:3]:
+            words = words[words.index(WAKE_WORD) + 1 :]
+        return " ".join(words)
+
+    def _sleep(self):
+        self._awake = False
+        self._barged_in = False
+        self._reset_partial()
+        self.recognizer.Reset()
+        if self.grammar_recognizer is not None:
+            self.grammar_recognizer.Reset()
+
+    def _emit_command(self, result):
+        hit = self.command_grammar.match(result)
+        if hit is None:
+            return False
+
+        cmd, phrase = hit
+        dispatched = self._dispatched
+        if self.wake_recognizer is not None:
+            self._sleep()
+        self._reset_partial()
+        if dispatched is None or dispatched[0] != cmd:
+            self._emitted.append(self._utterance(phrase, command=cmd))
+        return True
+
+    def _emit(self, result):
+        # The open recognizer endpointed first; a confident grammar hit still wins
+        if self.grammar_recognizer is not None:
+            if self._emit_command(self.grammar_recognizer.FinalResult()):
+                self.recognizer.Reset()
+                return
+
+        dispatched = self._dispatched
+        self._reset_partial()
+
+        start = time.monotonic()
+        try:
+            alternatives = parse_alternatives(result)
+        except json.JSONDecodeError:
+            return
+        finally:
+            self._observe("asr_result", start)
+        text = alternatives[0][0] if alternatives else ""
+
+        if self.wake_recognizer is not None:
+            words = text.split()
+            if WAKE_WORD in words[:3]:
+                words = words[words.index(WAKE_WORD) + 1 :]
+                if not words:
+                    # Only the wake word so far; keep listening for the command
+                    self._awake_since = time.monotonic()
+                    return
+            text = " ".join(words)
+            if not text:
+                return
+            self._sleep()
+
+        early_command = None
+        if dispatched is not None:
+            early_command = dispatched[0]
+            hit = self.command_grammar.match_partial(text)
+            if hit is not None and hit[0] == early_command:
+                return  # Already acted on from the partial result
+        if text:
+            self._emitted.append(
+                self._utterance(
+                    text,
+                    alternatives=self._clean_alternatives(alternatives),
+                    early_command=early_command,
+                )
+            )
+
+    def _clean_alternatives(self, alternatives):
+        # Same wake-word handling as the top hypothesis; drop empties and repeats
+        cleaned = []
+        seen = set()
+        for text, confidence in alternatives:
+            text = self._strip_wake_word(text)
+            if text and text not in seen:
+                seen.add(text)
+                cleaned.append((text, confidence))
+        return cleaned if len(cleaned) > 1 else []
+
+
+def create_listener(
+    model,
+    wake_word_mode=True,
+    early_dispatch=False,
+    speculate_after=None,
+    max_alternatives=1,
+    barge_in_on_energy=False,
+    metrics=None,
+):
+    """Builds the Listener with all of its recognizers.
+
+    model is a loaded vosk Model, or the path of one to load.
+    """
+    if isinstance(model, str):
+        model = Model(model)  # Load the speech recognition model
+    rec = KaldiRecognizer(model, SAMPLE_RATE)
+    if max_alternatives > 1:
+        # N-best final results for the router; partial results are unaffected
+        rec.SetMaxAlternatives(max_alternatives)
+
+    # Cheap grammar recognizer that only spots the wake word; the full
+    # open-vocabulary recognizer stays idle until it fires
+    wake_rec = (
+        KaldiRecognizer(model, SAMPLE_RATE, json.dumps([WAKE_WORD, "[unk]"]))
+        if wake_word_mode
+        else None
+    )
+
+    # Constrained recognizer that only knows the command phrases; shares the model
+    command_grammar = CommandGrammar(commands, extra_words=[WAKE_WORD])
+    grammar_rec = KaldiRecognizer(model, SAMPLE_RATE, command_grammar.grammar)
+    grammar_rec.SetWords(True)  # Per-word confidences decide fast-path hits
+
+    return Listener(
+        rec,
+        vad=VoiceActivityDetector(),
+        wake_recognizer=wake_rec,
+        command_grammar=command_grammar,
+        grammar_recognizer=grammar_rec,
+        barge_in_on_energy=barge_in_on_energy,
+        early_dispatch=early_dispatch,
+        speculate_after=speculate_after,
+        metrics=metrics,
+    )
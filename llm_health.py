@@ -0,0 +1,110 @@
+import threading
+import time
+import openai
+import requests
+
+FAILURE_THRESHOLD = 2  # Consecutive outages before the breaker opens
+RESET_TIMEOUT = 5.0  # Seconds the breaker stays open before a half-open probe
+PROBE_TIMEOUT = 2.0
+
+
+def is_outage(error):
+    """True for errors that mean the server is unreachable or unhealthy, not a bad request."""
+    if isinstance(error, (openai.APIConnectionError, requests.exceptions.Timeout)):
+        return True  # APITimeoutError is an APIConnectionError
+    if isinstance(error, openai.APIStatusError):
+        return error.status_code >= 500
+    return False
+
+
+class CircuitBreaker:
+    """Closed -> open after repeated failures; half-open lets a single probe decide."""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+
+    def __init__(
+        self, failure_threshold=FAILURE_THRESHOLD, reset_timeout=RESET_TIMEOUT
+    ):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+    def try_half_open(self):
+        """Moves an open breaker to half-open once reset_timeout has passed; returns whether it did."""
+        with self._lock:
+            if self.state != self.OPEN:
+                return False
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                return False
+            self.state = self.HALF_OPEN
+            return True
+
+
+class LLMHealth:
+    """Circuit breaker around the LLM endpoint with a background half-open prober."""
+
+    def __init__(self, client, breaker=None, probe_interval=1.0):
+        self.client = client.with_options(timeout=PROBE_TIMEOUT, max_retries=0)
+        self.breaker = breaker or CircuitBreaker()
+        self.probe_interval = probe_interval
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name="llm-health", daemon=True
+        )
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def allow_request(self):
+        """False while the breaker is open or probing: callers should fail fast."""
+        return self.breaker.state == CircuitBreaker.CLOSED
+
+    def record_success(self):
+        self.breaker.record_success()
+
+    def record_failure(self, error):
+        """Counts error against the breaker if it is an outage; returns whether it was."""
+        if not is_outage(error):
+            return False
+        was_closed = self.allow_request()
+        self.breaker.record_failure()
+        if was_closed and not self.allow_request():
+            print("...LLM endpoint unreachable, failing fast until it recovers...")
+        return True
+
+    def probe(self):
+        """True if the server answers and has a model loaded."""
+        try:
+            return len(self.client.models.list().data) > 0
+        except Exception:
+            return False
+
+    def _run(self):
+        while not self._stop_event.wait(self.probe_interval):
+            if not self.breaker.try_half_open():
+                continue
+            if self.probe():
+                self.breaker.record_success()
+                print("...LLM endpoint is back online...")
+            else:
+                self.breaker.record_failure()
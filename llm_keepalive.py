@@ -0,0 +1,60 @@
+import threading
+import time
+
+KEEPALIVE_SECONDS = 240.0  # Idle time before a keep-alive ping; 0 disables pings
+WARMUP_TIMEOUT = 120.0  # A cold model load on LM Studio can take a while
+POLL_SECONDS = 5.0
+
+
+class LLMKeepAlive(threading.Thread):
+    """Warms the LLM connection and model at startup, then pings it while idle."""
+
+    def __init__(self, client, messages, health=None, interval=KEEPALIVE_SECONDS):
+        super().__init__(name="llm-keepalive", daemon=True)
+        self.client = client
+        # Same prefix as real queries, so warm-up also primes the prompt cache
+        self.messages = messages
+        self.health = health  # Optional LLMHealth: no pings while the breaker is open
+        self.interval = interval
+        self.last_used = time.monotonic()
+        self._stop_event = threading.Event()
+
+    def touch(self):
+        """Records real LLM traffic, which keeps the model loaded by itself."""
+        self.last_used = time.monotonic()
+
+    def run(self):
+        start = time.monotonic()
+        if self._ping():
+            print(f"...LLM warmed up in {time.monotonic() - start:.2f}s...")
+
+        while self.interval and not self._stop_event.wait(POLL_SECONDS):
+            if time.monotonic() - self.last_used < self.interval:
+                continue
+            if self.health is not None and not self.health.allow_request():
+                continue
+            self._ping()
+
+    def _ping(self):
+        # One generated token: enough to load the model and open a pooled connection
+        try:
+            self.client.chat.completions.create(
+                model="local-model",
+                messages=self.messages,
+                max_tokens=1,
+                temperature=0.0,
+                timeout=WARMUP_TIMEOUT,
+            )
+        except Exception as e:
+            if self.health is not None:
+                self.health.record_failure(e)
+            return False
+        finally:
+            self.touch()
+
+        if self.health is not None:
+            self.health.record_success()
+        return True
+
+    def stop(self):
+        self._stop_event.set()
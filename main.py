@@ -1,409 +1,64 @@
 import os
 import sys
 import random
-import subprocess
-import platform
-import json
-import time
-from vosk import (
-    Model,
-    KaldiRecognizer,
-)  # Imports Vosk library for offline speech recognition
-import pyaudio  # Imports PyAudio for microphone access
-from gtts import gTTS  # Imports gTTS for Text-to-Speech
-from playsound import playsound
-from datetime import datetime
-from rapidfuzz import fuzz  # Imports for fuzzy string matching (command comparison)
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from commands import commands, command_response, is_forced_llm, LENGTH_EXEMPT
+from audio_capture import AudioCapture  # Callback-mode microphone capture
+from listener import create_listener, playback_state, StablePartial, WAKE_WORD
+from asr_worker import ASRWorker  # Same recognizers in a separate process
+from intent_matcher import IntentMatcher  # Indexed fuzzy keyword router
+from tts import create_backend  # Pluggable Text-to-Speech backends
+from tts_cache import AudioCache, CachedBackend  # Reuses audio of repeated replies
+from audio_playback import AudioPlayer  # In-memory PCM playback
+from speech_queue import SpeechQueue  # Synthesis/playback stages with barge-in
+from conversation import Conversation, LLM_OFFLINE_APOLOGY, SYSTEM_PROMPT
+from speculation import Speculator  # LLM answers started from stable partials
+from memory import SummaryWorker  # Summarizes old turns while idle
+from llm_health import LLMHealth  # Circuit breaker for the local LLM endpoint
+from llm_keepalive import LLMKeepAlive  # Startup warm-up and idle keep-alive pings
+from metrics import Metrics, serve_metrics, start_log_reporter  # Per-stage latency
 from openai import OpenAI
-import requests
-
-# Initialize OpenAI client to connect to a local LLM server (e.g., LM Studio)
-client = OpenAI(base_url="http://localhost:1234/v1", api_key="lm-studio")
-
-conversation_history = []
-MAX_HISTORY = 3  # Maximum turns to keep for LLM context
-last_operation = "None recorded."
-
-# Keywords that force a direct call to the LLM, even if short
-FORCED_LLM_WORDS = [
-    "yes",
-    "no",
-    "okay",
-    "ok",
-    "yep",
-    "nope",
-    "yeah",
-    "nah",
-    "why",
-    "who",
-    "what",
-    "where",
-    "when",
-    "how",
-    "answer",
-]
-
-
-def speak(text):
-    """Speaks the provided text using gTTS and playsound."""
-    print(f"<< Jarvis: {text}")
-    filename = "temp.mp3"
-    try:
-        # Cleanup " sir" variants for better TTS
-        tts_text = (
-            text.replace(" sir.", " sir")
-            .replace(" sir!", " sir")
-            .replace(" sir?", " sir")
-        )
-
-        tts = gTTS(text=tts_text, lang="en", slow=False)
-        tts.save(filename)
-        playsound(filename)
-    except Exception as e:
-        print(f"TTS Error (gTTS/playsound): {e}. Skipping speech.")
-    finally:
-        time.sleep(0.1)
-        if os.path.exists(filename):
-            try:
-                os.remove(filename)  # Clean up temp file
-            except PermissionError:
-                pass
-
-
-def open_app(command_list, name):
-    """Universal function to open applications based on OS."""
-    try:
-        if platform.system() == "Windows":
-            subprocess.Popen(["start"] + command_list, shell=True)
-        elif platform.system() == "Darwin":  # macOS logic
-            app_name = (
-                name
-                if name not in ["YouTube"]
-                else ("Google Chrome" if "chrome" in name.lower() else "iTunes")
-            )
-            if app_name in ["Google Chrome", "iTunes"]:
-                subprocess.Popen(["open", "-a", app_name])
-            elif command_list and command_list[0].startswith("http"):
-                subprocess.Popen(["open", command_list[0]])
-            else:
-                subprocess.Popen(command_list)
-        else:
-            subprocess.Popen(command_list)  # Generic Linux/other
-        return f"Opening {name}"
-    except Exception:
-        return f"Could not open {name}"
-
-
-def open_chrome():
-    return open_app(["chrome"], "Google Chrome")
-
-
-def open_youtube():
-    return open_app(["https://www.youtube.com"], "YouTube")
-
-
-def open_itunes():
-    return open_app(["itunes"], "iTunes")
+import httpx  # HTTP transport used by the OpenAI client
+
+WAKE_WORD_MODE = True  # Only act on speech that starts with the wake word
+# Interrupt Jarvis by talking clearly louder than its own voice. With the wake
+# word off this is the only barge-in: audio heard during playback is otherwise
+# muted, so turning both off means Jarvis can't be interrupted.
+BARGE_IN_ON_ENERGY = not WAKE_WORD_MODE
+# Decode in a worker process so Kaldi does not compete with routing, the LLM
+# client and playback for this interpreter's GIL
+ASR_WORKER_PROCESS = False
+# Act on exact command phrases from stable partial results instead of
+# waiting for Vosk to endpoint
+EARLY_DISPATCH = True
+# Start the LLM request once a partial transcript has been stable this long
+# (seconds of audio); None waits for the final result
+SPECULATE_AFTER = 0.5
+# N-best hypotheses per final result; the router weighs them all, so a
+# misheard command can still resolve locally
+NBEST_ALTERNATIVES = 3
+
+# Bounded queues between stages: a slow stage holds back the one before it
+AUDIO_QUEUE_SIZE = 16  # Captured chunks (4 s) waiting for the recognizer
+UTTERANCE_QUEUE_SIZE = 4
+QUESTION_QUEUE_SIZE = 2
+READ_TIMEOUT = 0.5  # Capture read timeout; keeps the wake timeout ticking in silence
 
+greetings = [
+    "Systems online, sir.",
+    "Mini Jarvis online and operational.",
+    "Greetings. How may I be of assistance?",
+    "Online. Proceed with your query.",
+]
 
-def ask_llm(user_text):
-    """Sends a query to the local LLM with conversation history."""
-    global last_operation
-
-    history_messages = []
-    # Prepare history for LLM context
-    for turn in conversation_history:
-        user_message = turn["user"]
-        jarvis_message = (
-            turn["jarvis"]
-            .replace(" sir.", "")
-            .replace(" sir!", "")
-            .replace(" sir?", "")
-        )
-
-        history_messages.append({"role": "user", "content": user_message})
-        history_messages.append({"role": "assistant", "content": jarvis_message})
-
-    # System prompt defines Jarvis's persona and response rules
-    system_instruction = (
-        "You are Jarvis, Tony Stark's witty and superior AI assistant. "
-        "Your responses must be in English. Answer in full sentences, but be **extremely concise** and **avoid any excessive politeness, introductions, or verbose filler phrases**. "
-        "Answer all questions using your internal knowledge. Do not mention external search or real-time data needs. "
-        "Maintain factual accuracy. Respond directly to the user's input with a touch of Jarvis's dry humor. "
-        f"The last internal operation was: {last_operation}. "
-    )
-
-    messages = [{"role": "system", "content": system_instruction}]
-    messages.extend(history_messages)
-    messages.append({"role": "user", "content": user_text})
-
-    try:
-        # API call to the local LLM endpoint
-        completion = client.chat.completions.create(
-            model="local-model",
-            messages=messages,
-            temperature=0.2,
-            timeout=15,
-        )
-        final_response = completion.choices[0].message.content.strip()
-
-        last_operation = f"LLM Query: {user_text}, LLM Response: {final_response}"
-        return final_response
-
-    except requests.exceptions.Timeout:
-        return "Sir, the network operation timed out while waiting for a response from the LLM."
-    except Exception as e:
-        return f"Sir, I seem to have lost connection to the mainframe. Error: {e}"
-
-
-# --- Vosk and PyAudio Setup ---
-
-if not os.path.exists("model"):
-    print("Error: Vosk model 'model' folder not found. Please download and unpack it.")
-    sys.exit(1)
-
-model = Model("model")  # Load the speech recognition model
-rec = KaldiRecognizer(model, 16000)
 
-p = pyaudio.PyAudio()
-try:
-    # Open microphone stream
-    stream = p.open(
-        format=pyaudio.paInt16,
-        channels=1,
-        rate=16000,
-        input=True,
-        frames_per_buffer=8000,
+def clean_for_tts(text):
+    """Cleans up " sir" variants for better TTS."""
+    return (
+        text.replace(" sir.", " sir").replace(" sir!", " sir").replace(" sir?", " sir")
     )
-    stream.start_stream()
-except Exception as e:
-    print(
-        f"FATAL ERROR: Could not open PyAudio stream. Check your microphone drivers or if another application is using the microphone. Error: {e}"
-    )
-    sys.exit(1)
-
-# --- Hardcoded Commands Dictionary ---
-
-commands = {
-    "time": {
-        "keywords": [
-            "time",
-            "what time",
-            "what time is it",
-            "current time",
-            "tell me the time",
-            "whats the time",
-            "time right now",
-            "what is the time now",
-            "do you know the time",
-            "what's the current hour",
-            "check the clock",
-            "the time please",
-            "what hour is it",
-            "exact time now",
-            "time check",
-        ],
-        "responses": [
-            lambda: f"The time is {datetime.now().strftime('%I:%M %p')}",
-            lambda: f"Right now it's {datetime.now().strftime('%I:%M %p')}",
-            lambda: f"It's currently {datetime.now().strftime('%I:%M %p')}",
-            lambda: f"The current time is {datetime.now().strftime('%I:%M %p')}",
-        ],
-    },
-    "date": {
-        "keywords": [
-            "date",
-            "what's the date",
-            "today's date",
-            "whats the date today",
-            "tell me the date",
-            "current date",
-            "what day is it",
-            "what day is today",
-            "what is today's date",
-            "can you tell me the date",
-            "date check",
-            "what day of the week",
-            "the date today",
-        ],
-        "responses": [
-            lambda: f"Today is {datetime.now().strftime('%B %d, %Y')}",
-            lambda: f"The date today is {datetime.now().strftime('%B %d, %Y')}",
-            lambda: f"It's {datetime.now().strftime('%B %d, %Y')} today",
-            lambda: f"Today's date is {datetime.now().strftime('%A, %B %d, %Y')}",
-        ],
-    },
-    "how_are_you": {
-        "keywords": [
-            "how are you",
-            "how's it going",
-            "how do you feel",
-            "whats up",
-            "what's up",
-            "how you doing",
-            "how are things",
-            "how ya doing",
-            "you good",
-            "how's your day",
-            "what are you up to",
-            "how do you function",
-            "tell me how you feel",
-        ],
-        "responses": [
-            "I'm just a bunch of code, but I'm running perfectly!",
-            "Feeling operational! Thanks for asking.",
-            "All systems go. How can I assist you today?",
-            "Fantastic! Ready to help you!",
-            "I'm doing great, thanks for asking!",
-        ],
-    },
-    "joke": {
-        "keywords": [
-            "tell me a joke",
-            "joke",
-            "make me laugh",
-            "say something funny",
-            "I need a joke",
-            "got any jokes",
-            "tell a joke please",
-            "amuse me",
-            "crack a joke",
-            "say a funny thing",
-            "tell me a funny story",
-            "I'm bored tell a joke",
-            "make me chuckle",
-        ],
-        "responses": [
-            "Why did the computer go to the doctor? Because it caught a virus!",
-            "Why do programmers prefer dark mode? Because light attracts bugs!",
-            "I would tell you a UDP joke, but you might not get it.",
-            "Why do Java developers wear glasses? Because they can't C sharp!",
-            "How many programmers does it take to change a light bulb? None, that's a hardware problem!",
-        ],
-    },
-    "thanks": {
-        "keywords": [
-            "thank you",
-            "thanks",
-            "thx",
-            "thank you so much",
-            "thanks a lot",
-            "appreciate it",
-            "much appreciated",
-            "cheers",
-            "you're the best",
-            "thanks jarvis",
-            "good job",
-            "nice one",
-            "i thank you",
-            "i am grateful",
-            "many thanks",
-            "apology",
-            "i'm sorry",
-            "i am sorry",
-            "sorry",
-        ],
-        "responses": [
-            "You're welcome!",
-            "No problem, happy to help!",
-            "Anytime, my friend.",
-            "My pleasure!",
-            "Glad I could assist!",
-            "Understood, apology accepted.",
-        ],
-    },
-    "hello": {
-        "keywords": [
-            "hello",
-            "hi",
-            "hey",
-            "hi there",
-            "greetings",
-            "hello jarvis",
-            "hey there",
-            "good day",
-            "howdy",
-            "what's up",
-            "hey assistant",
-            "good evening",
-            "good afternoon",
-            "morning",
-            "afternoon",
-            "good morning",
-            "top of the morning",
-            "good morning to you",
-        ],
-        "responses": [
-            "Hello! How can I help you today?",
-            "Hi there! Great to see you!",
-            "Hey! What's on your mind?",
-            "Greetings! Ready to assist!",
-            "Hi! What can I do for you?",
-            "Good morning! Ready for a productive day?",
-        ],
-    },
-    "chrome": {
-        "keywords": [
-            "open chrome",
-            "launch chrome",
-            "start chrome",
-            "chrome",
-            "google",
-            "open browser",
-            "start the browser",
-            "launch google chrome",
-            "open google",
-            "can you open chrome",
-        ],
-        "responses": [open_chrome],  # Calls the function to open the app
-    },
-    "youtube": {
-        "keywords": [
-            "open youtube",
-            "youtube",
-            "launch youtube",
-            "start youtube",
-            "open videos",
-            "youtube videos",
-            "access youtube",
-            "go to youtube",
-            "launch the youtube website",
-        ],
-        "responses": [open_youtube],  # Calls the function to open the URL
-    },
-    "itunes": {
-        "keywords": [
-            "open itunes",
-            "itunes",
-            "launch itunes",
-            "start itunes",
-            "music",
-            "play music",
-            "open my music app",
-            "launch apple music",
-            "start apple music",
-            "can you open itunes",
-        ],
-        "responses": [open_itunes],  # Calls the function to open the app
-    },
-    "shut down": {
-        "keywords": [
-            "shut down",
-            "stop",
-            "turn off",
-            "exit",
-            "quit",
-            "terminate",
-            "end program",
-            "close jarvis",
-            "stop listening",
-            "exit application",
-            "i'm done",
-            "goodbye and shut down",
-        ],
-        "responses": ["Shutting down. Goodbye!"],
-    },
-}
 
 
 def format_for_tts(response, add_sir):
@@ -420,100 +75,405 @@ def format_for_tts(response, add_sir):
     return stripped_resp + " sir."
 
 
-greetings = [
-    "Systems online, sir.",
-    "Mini Jarvis online and operational.",
-    "Greetings. How may I be of assistance?",
-    "Online. Proceed with your query.",
-]
-
-speak(random.choice(greetings))
-print("Listening...")
+def route_utterance(intent_matcher, utterance):
+    """Decides what an utterance asks for; shared with the benchmark.
 
-# --- Main Recognition Loop ---
-while True:
-    data = stream.read(4000, exception_on_overflow=False)
+    Returns (command, or None for the LLM; the IntentMatch if fuzzy routing
+    ran; whether that command was already dispatched early for this utterance).
+    """
+    # Grammar fast path: the command is already known, skip fuzzy matching
+    command = utterance.command
+    route = None
 
-    if rec.AcceptWaveform(data):
-        result = rec.Result()
+    # Check for short, conversational forced LLM words
+    if command is None and not is_forced_llm(utterance.text):
+        # Rank every hardcoded command in one pass; close calls go to the LLM
+        if utterance.alternatives:
+            route = intent_matcher.route_alternatives(utterance.alternatives)
+        else:
+            route = intent_matcher.route(utterance.text)
+        command = route.command
+
+    # e.g. "open youtube please" after "open youtube" was dispatched
+    duplicate = command is not None and command == utterance.early_command
+    return command, route, duplicate
+
+
+class Jarvis:
+    """The assistant as asyncio stages: capture -> ASR -> routing -> LLM -> TTS -> playback.
+
+    Stages are joined by bounded queues and blocking work (microphone reads,
+    Kaldi, the LLM stream, synthesis, playback) runs in executors, so the
+    assistant keeps listening while it thinks and speaks.
+    """
+
+    def __init__(
+        self,
+        capture,
+        listener,
+        intent_matcher,
+        conversation,
+        speech,
+        keepalive,
+        metrics,
+        speculator=None,
+    ):
+        self.capture = capture
+        self.listener = listener
+        self.intent_matcher = intent_matcher
+        self.conversation = conversation
+        self.speech = speech
+        self.keepalive = keepalive
+        self.metrics = metrics
+        self.speculator = speculator  # Optional Speculator fed by StablePartial hints
+        self._thinking = False
+        self._answer_cancelled = (
+            None  # Set by barge_in() to stop the answer being streamed
+        )
+        # Single workers: Kaldi recognizers and the chat history are not shared
+        self._capture_executor = ThreadPoolExecutor(1, thread_name_prefix="capture")
+        self._asr_executor = ThreadPoolExecutor(1, thread_name_prefix="asr")
+        self._llm_executor = ThreadPoolExecutor(1, thread_name_prefix="llm")
+        self._command_executor = ThreadPoolExecutor(1, thread_name_prefix="command")
+
+    def speak(self, text, heard_at=None):
+        """Queues the provided text for speech and returns without waiting for playback.
+
+        Returns a future that is True once the text has been played in full.
+        """
+        print(f"<< Jarvis: {text}")
+        return self.speech.say(clean_for_tts(text), heard_at)
+
+    def barge_in(self):
+        """Called from the ASR thread when the user starts talking over Jarvis."""
+        interrupted = self.speech.interrupt()
+        # Also stop the LLM, or the rest of the answer would be queued anyway
+        answer_cancelled = self._answer_cancelled
+        if answer_cancelled is not None and not answer_cancelled.is_set():
+            answer_cancelled.set()
+            interrupted = True
+        if interrupted:
+            print("...Interrupted...")
+
+    async def run(self):
+        """Runs every stage until the user asks Jarvis to shut down."""
+        self._loop = asyncio.get_running_loop()
+        self._audio = asyncio.Queue(maxsize=AUDIO_QUEUE_SIZE)
+        self._utterances = asyncio.Queue(maxsize=UTTERANCE_QUEUE_SIZE)
+        self._questions = asyncio.Queue(maxsize=QUESTION_QUEUE_SIZE)
+        self._shutdown = asyncio.Event()
+
+        tasks = self.speech.start()
+        self.speak(random.choice(greetings))
+        tasks += [
+            asyncio.create_task(self._capture_stage(), name="capture"),
+            asyncio.create_task(self._asr_stage(), name="asr"),
+            asyncio.create_task(self._routing_stage(), name="routing"),
+            asyncio.create_task(self._llm_stage(), name="llm"),
+        ]
+        shutdown = asyncio.create_task(self._shutdown.wait())
         try:
-            text = json.loads(result).get("text", "").lower()
-        except json.JSONDecodeError:
-            continue
-
-        if not text:
-            continue
+            # A stage only returns by raising; don't let it die silently
+            done, _ = await asyncio.wait(
+                tasks + [shutdown], return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                task.result()
+        finally:
+            shutdown.cancel()
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            for executor in (
+                self._capture_executor,
+                self._asr_executor,
+                self._llm_executor,
+                self._command_executor,
+            ):
+                executor.shutdown(wait=False)
+            self.speech.close()
+
+    async def _capture_stage(self):
+        while True:
+            data = await self._loop.run_in_executor(
+                self._capture_executor, self.capture.read_chunk, READ_TIMEOUT
+            )
+            # Tagged as it is read, while the playback state still matches the audio
+            playback = playback_state(self.speech.now_playing)
+            await self._audio.put((data, playback))
+
+    async def _asr_stage(self):
+        while True:
+            data, playback = await self._audio.get()
+            for result in await self._loop.run_in_executor(
+                self._asr_executor, self.listener.feed, data, playback
+            ):
+                if isinstance(result, StablePartial):
+                    self._speculate(result.text)
+                else:
+                    await self._utterances.put(result)
+
+    def _speculate(self, text):
+        """Starts the LLM on a stable partial that looks like it will end up there."""
+        if self.speculator is None:
+            return
+        # Don't compete with a real answer for the server
+        if self._thinking or not self._questions.empty():
+            return
+        if self.intent_matcher.route(text).command is not None:
+            return
+        if self.conversation.has_cached_answer(text):
+            return
+        if not self.conversation.llm_health.allow_request():
+            return
+        self.keepalive.touch()
+        self.speculator.start(text)
+
+    async def _routing_stage(self):
+        while True:
+            utterance = await self._utterances.get()
+            text = utterance.text
+            self.conversation.memory.begin_turn()
+
+            print(f">> You: {text}")
+            if utterance.early:
+                print("...Dispatched before endpointing...")
+
+            add_sir_flag = random.random() < 0.33  # 33% chance to add "sir"
+
+            with self.metrics.span("routing"):
+                matched_cmd, route, duplicate = route_utterance(
+                    self.intent_matcher, utterance
+                )
+            if route is not None and route.ambiguous:
+                print(f"...Ambiguous command ({route.describe()}), deferring to LLM...")
+
+            if duplicate:
+                print("...Already handled before endpointing...")
+                self.conversation.memory.end_turn()
+                continue
+
+            if matched_cmd is None:
+                # Fallback to LLM if no command matched; routing moves on meanwhile
+                await self._questions.put((utterance, add_sir_flag))
+                continue
+
+            if self.speculator is not None:
+                self.speculator.discard()  # It was a command after all
+
+            # Commands may launch applications; keep that off the event loop
+            with self.metrics.span("command"):
+                raw_response = await self._loop.run_in_executor(
+                    self._command_executor, command_response, matched_cmd
+                )
+
+            if matched_cmd == "shut down":
+                self.speak(raw_response, utterance.heard_at)
+                await self.speech.wait()
+                self._shutdown.set()
+                return
 
-        print(f">> You: {text}")
+            final_response = format_for_tts(raw_response, add_sir_flag)
+            self.speak(final_response, utterance.heard_at)
 
-        found_command = False
-        raw_response = ""
+            self.conversation.last_operation = (
+                f"Hard Command: {text}, Response: {final_response}"
+            )
+            self.conversation.memory.add(text, final_response)
+            print("-" * 30)
+
+    async def _llm_stage(self):
+        while True:
+            utterance, add_sir_flag = await self._questions.get()
+            self._thinking = True
+            text = utterance.text
+            print("...Consulting Gemma 3 via LM Studio...")
+            self.keepalive.touch()
+
+            speculation = None
+            if self.speculator is not None and self.speculator.active:
+                # Re-issued below if the final transcript asks something else
+                speculation = self.speculator.take(text)
+                outcome = "used" if speculation is not None else "discarded"
+                print(f"...Speculative answer {outcome} ({self.speculator.stats()})...")
+
+            # Speak each sentence as soon as it is complete, while the rest generates
+            spoken = []
+            played = []
+            if speculation is not None:
+                cancelled = speculation.cancelled
+                sentences = speculation.sentences()
+            else:
+                cancelled = threading.Event()
+                sentences = self.conversation.ask_llm_stream(text, cancelled)
+            self._answer_cancelled = cancelled
+            while True:
+                sentence = await self._loop.run_in_executor(
+                    self._llm_executor, next, sentences, None
+                )
+                if sentence is None or cancelled.is_set():
+                    break
+                if not spoken and sentence != LLM_OFFLINE_APOLOGY:
+                    # "sir" goes on the first sentence; the last one isn't known yet.
+                    # The offline apology is left as-is so it plays from the audio cache.
+                    sentence = format_for_tts(sentence, add_sir_flag)
+                # Only the first sentence closes the voice-to-voice span
+                played.append(
+                    self.speak(sentence, None if spoken else utterance.heard_at)
+                )
+                spoken.append(sentence)
+            self._answer_cancelled = None
+
+            if cancelled.is_set():
+                # Barge-in: the stream is closed and only what was heard is kept
+                await self._loop.run_in_executor(self._llm_executor, sentences.close)
+                finished = await asyncio.gather(*played)
+                spoken = [s for s, done in zip(spoken, finished) if done]
+            else:
+                if not spoken:
+                    raw_response = "I have received your query, but the network response was null. Could you repeat that that, sir?"
+                    spoken.append(format_for_tts(raw_response, add_sir_flag))
+                    self.speak(spoken[0], utterance.heard_at)
 
-        add_sir_flag = random.random() < 0.33  # 33% chance to add "sir"
+                if speculation is not None and speculation.answer:
+                    self.conversation.remember_answer(text, speculation.answer)
 
-        # Check for short, conversational forced LLM words
-        is_forced_llm = False
-        if len(text.split()) <= 2:
-            for word in FORCED_LLM_WORDS:
-                if fuzz.ratio(text, word) > 90:
-                    is_forced_llm = True
-                    break
+            # Update conversation history; old turns are evicted by token budget
+            if spoken:
+                self.conversation.memory.add(text, " ".join(spoken))
+            else:
+                # Cut off before the first sentence finished; nothing to remember
+                self.conversation.memory.end_turn()
+            self._thinking = False
+            print("-" * 30)
+
+
+def main():
+    # First installed engine in tts.TTS_BACKENDS: offline ones, then gTTS.
+    # Repeated replies (jokes, greetings, goodbyes) are played from the disk cache
+    tts_backend = CachedBackend(create_backend(), AudioCache())
+    player = AudioPlayer()  # Output stream stays open between replies
+    # Latency histograms per pipeline stage, served on /metrics and logged periodically
+    metrics = Metrics()
+    speech = SpeechQueue(tts_backend, player, metrics=metrics)
+
+    # Initialize OpenAI client to connect to a local LLM server (e.g., LM Studio)
+    # No client-side retries: the circuit breaker decides when to try again.
+    # Pooled connections outlive the keep-alive interval so pings reuse them.
+    client = OpenAI(
+        base_url="http://localhost:1234/v1",
+        api_key="lm-studio",
+        max_retries=0,
+        http_client=httpx.Client(
+            limits=httpx.Limits(max_keepalive_connections=4, keepalive_expiry=300.0)
+        ),
+    )
+    llm_health = LLMHealth(client)
+    conversation = Conversation(client, llm_health, metrics)
 
-        if not is_forced_llm:
-            # Check for hardcoded commands
-            for cmd, info in commands.items():
-                for kw in info["keywords"]:
-                    similarity = fuzz.ratio(text, kw.lower())
-                    partial_similarity = fuzz.partial_ratio(text, kw.lower())
-
-                    # Skip if keyword is much longer than input to avoid false positives
-                    if cmd not in ["chrome", "youtube", "itunes"]:
-                        length_ratio = len(kw) / max(len(text), 1)
-                        if length_ratio < 0.5 and similarity < 90:
-                            continue
-
-                    if similarity > 85 or partial_similarity > 98:  # Match threshold
-
-                        raw_resp = info["responses"]
-                        if isinstance(raw_resp, list):
-                            item = random.choice(raw_resp)
-                            raw_response = item() if callable(item) else item
-                        else:
-                            raw_response = (
-                                raw_resp() if callable(raw_resp) else raw_response
-                            )
-
-                        if cmd == "shut down":
-                            speak(raw_response)
-                            exit()  # Terminate program
-
-                        final_response = format_for_tts(raw_response, add_sir_flag)
-                        speak(final_response)
-
-                        last_operation = (
-                            f"Hard Command: {text}, Response: {final_response}"
-                        )
-                        found_command = True
-                        break
-                if found_command:
-                    break
+    # --- Vosk and PyAudio Setup ---
 
-        if not found_command:
-            # Fallback to LLM if no command matched
-            print("...Consulting Gemma 3 via LM Studio...")
+    if not os.path.exists("model"):
+        print(
+            "Error: Vosk model 'model' folder not found. Please download and unpack it."
+        )
+        sys.exit(1)
+
+    capture = AudioCapture()
+    # Audio lost before the recognizer saw it: ring overruns and device overflows
+    metrics.add_counter("capture_dropped_bytes", lambda: capture.ring.dropped)
+    metrics.add_counter("capture_overflows", lambda: capture.overflows)
+    if ASR_WORKER_PROCESS:
+        listener = ASRWorker(
+            "model",
+            WAKE_WORD_MODE,
+            metrics=metrics,
+            chunk_bytes=capture.chunk_bytes,
+            early_dispatch=EARLY_DISPATCH,
+            speculate_after=SPECULATE_AFTER,
+            max_alternatives=NBEST_ALTERNATIVES,
+            barge_in_on_energy=BARGE_IN_ON_ENERGY,
+        )
+        listener.start()
+    else:
+        listener = create_listener(
+            "model",
+            WAKE_WORD_MODE,
+            early_dispatch=EARLY_DISPATCH,
+            speculate_after=SPECULATE_AFTER,
+            max_alternatives=NBEST_ALTERNATIVES,
+            barge_in_on_energy=BARGE_IN_ON_ENERGY,
+            metrics=metrics,
+        )
 
-            raw_response = ask_llm(text)
+    try:
+        # Open microphone stream; audio lands in a ring buffer from the PyAudio callback
+        capture.start()
+    except Exception as e:
+        print(
+            f"FATAL ERROR: Could not open PyAudio stream. Check your microphone drivers or if another application is using the microphone. Error: {e}"
+        )
+        sys.exit(1)
+
+    jarvis = Jarvis(
+        capture,
+        listener,
+        # Keyword index built once at startup
+        IntentMatcher(commands, length_exempt=LENGTH_EXEMPT),
+        conversation,
+        speech,
+        # Load the model and open a connection while the greeting plays
+        LLMKeepAlive(
+            client,
+            [
+                {"role": "system", "content": SYSTEM_PROMPT},
+                {"role": "user", "content": "Hello."},
+            ],
+            health=llm_health,
+        ),
+        metrics,
+        speculator=Speculator(conversation) if SPECULATE_AFTER is not None else None,
+    )
+    listener.on_user_speech = jarvis.barge_in
 
-            if not raw_response:
-                raw_response = "I have received your query, but the network response was null. Could you repeat that that, sir?"
+    # Folds evicted turns into the summary while nobody is talking
+    summary_worker = SummaryWorker(
+        conversation.memory,
+        conversation.summarize_turns,
+        is_busy=lambda: speech.busy or not llm_health.allow_request(),
+    )
 
-            final_response = format_for_tts(raw_response, add_sir_flag)
-            speak(final_response)
+    jarvis.keepalive.start()
 
-        # Update and trim conversation history
-        conversation_history.append({"user": text, "jarvis": final_response})
+    # Have the offline apology in the audio cache before it is ever needed
+    speech.prefetch(clean_for_tts(LLM_OFFLINE_APOLOGY))
 
-        if len(conversation_history) > MAX_HISTORY:
-            conversation_history.pop(0)
+    summary_worker.start()
+    llm_health.start()
+    try:
+        serve_metrics(metrics)
+    except OSError as e:
+        print(f"Metrics endpoint unavailable: {e}")
+    metrics_log = start_log_reporter(metrics)
+    print(f"Listening for '{WAKE_WORD}'..." if WAKE_WORD_MODE else "Listening...")
 
-        print("-" * 30)
+    try:
+        asyncio.run(jarvis.run())
+    finally:
+        metrics_log.set()
+        print(metrics.log_line())
+        if jarvis.speculator is not None:
+            jarvis.speculator.discard()
+            print(f"Speculation: {jarvis.speculator.stats()}")
+        print(f"TTS audio cache: {tts_backend.cache.stats()}")
+        summary_worker.stop()
+        llm_health.stop()
+        jarvis.keepalive.stop()
+        if ASR_WORKER_PROCESS:
+            listener.stop()
+        capture.stop()
+        player.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+import threading
+import time
+
+HISTORY_TOKEN_BUDGET = 800  # Prompt tokens allowed for summary plus recent turns
+SUMMARY_TOKEN_BUDGET = 150
+MESSAGE_OVERHEAD_TOKENS = 4  # Role markers and separators per chat message
+IDLE_SECONDS = 5.0  # Quiet time before the background summarizer may run
+
+
+def estimate_tokens(text):
+    """Cheap token estimate (~4 characters per token for English)."""
+    return len(text) // 4 + 1
+
+
+class ConversationMemory:
+    """Recent turns kept within a token budget; older turns fold into a running summary."""
+
+    def __init__(
+        self,
+        budget=HISTORY_TOKEN_BUDGET,
+        summary_budget=SUMMARY_TOKEN_BUDGET,
+        count_tokens=estimate_tokens,
+    ):
+        self.budget = budget
+        self.summary_budget = summary_budget
+        self.count_tokens = count_tokens
+        self.turns = []  # [{"user": ..., "jarvis": ...}], oldest first
+        self.summary = ""
+        self.evicted = []  # Turns dropped from the prompt but not yet summarized
+        self.last_activity = time.monotonic()
+        self._in_turn = False
+        self._lock = threading.Lock()
+
+    def _turn_tokens(self, turn):
+        return (
+            self.count_tokens(turn["user"])
+            + self.count_tokens(turn["jarvis"])
+            + 2 * MESSAGE_OVERHEAD_TOKENS
+        )
+
+    def tokens(self):
+        """Prompt tokens currently used by the summary and the kept turns."""
+        total = sum(self._turn_tokens(t) for t in self.turns)
+        if self.summary:
+            total += self.count_tokens(self.summary) + 2 * MESSAGE_OVERHEAD_TOKENS
+        return total
+
+    def add(self, user, jarvis):
+        """Records a turn and evicts the oldest turns until the budget fits again."""
+        with self._lock:
+            self.turns.append({"user": user, "jarvis": jarvis})
+            # The newest turn always stays, even if it alone is over budget
+            while len(self.turns) > 1 and self.tokens() > self.budget:
+                self.evicted.append(self.turns.pop(0))
+            self.last_activity = time.monotonic()
+            self._in_turn = False
+
+    def begin_turn(self):
+        """Marks a turn in progress; summarization waits until add() closes it."""
+        self._in_turn = True
+        self.last_activity = time.monotonic()
+
+    def end_turn(self):
+        """Closes a turn that recorded nothing (a dropped duplicate, an answer cut off)."""
+        self._in_turn = False
+        self.last_activity = time.monotonic()
+
+    def idle(self):
+        return (
+            not self._in_turn and time.monotonic() - self.last_activity >= IDLE_SECONDS
+        )
+
+    def summarize(self, summarizer):
+        """Folds evicted turns into the summary with summarizer(summary, turns) -> str."""
+        with self._lock:
+            if not self.evicted:
+                return False
+            turns, self.evicted = self.evicted, []
+            previous = self.summary
+
+        try:
+            summary = summarizer(previous, turns).strip()
+        except Exception as e:
+            print(f"Memory summarization failed: {e}")
+            with self._lock:
+                self.evicted = turns + self.evicted  # Retry on the next idle spell
+            return False
+
+        # Hard cap in case the model ignored the length instruction
+        while summary and self.count_tokens(summary) > self.summary_budget:
+            summary = summary.rsplit(" ", 1)[0] if " " in summary else ""
+
+        with self._lock:
+            self.summary = summary
+            while len(self.turns) > 1 and self.tokens() > self.budget:
+                self.evicted.append(self.turns.pop(0))
+        return True
+
+
+class SummaryWorker(threading.Thread):
+    """Background thread that summarizes evicted turns while the assistant is idle."""
+
+    def __init__(self, memory, summarizer, is_busy=None, poll_seconds=1.0):
+        super().__init__(name="memory-summarizer", daemon=True)
+        self.memory = memory
+        self.summarizer = summarizer
+        self.is_busy = is_busy  # Optional callable, e.g. speech still playing
+        self.poll_seconds = poll_seconds
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.poll_seconds):
+            if not self.memory.evicted or not self.memory.idle():
+                continue
+            if self.is_busy is not None and self.is_busy():
+                continue
+            self.memory.summarize(self.summarizer)
+
+    def stop(self):
+        self._stop_event.set()
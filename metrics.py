@@ -0,0 +1,163 @@
+import json
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Histogram bucket upper bounds in seconds (Prometheus "le" labels)
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+RECENT_SAMPLES = 512  # Raw samples kept per stage for percentiles
+METRICS_PORT = 9108
+LOG_INTERVAL = 60.0
+
+
+class Histogram:
+    """Cumulative bucket counts plus a window of recent samples for percentiles."""
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.recent = deque(maxlen=RECENT_SAMPLES)
+
+    def observe(self, seconds):
+        self.count += 1
+        self.sum += seconds
+        self.recent.append(seconds)
+        for i, bound in enumerate(self.buckets):
+            if seconds <= bound:
+                self.counts[i] += 1
+
+    def percentile(self, q):
+        if not self.recent:
+            return None
+        values = sorted(self.recent)
+        return values[min(len(values) - 1, int(q / 100.0 * len(values)))]
+
+
+class Metrics:
+    """Per-stage latency histograms for the voice pipeline, plus a few counters."""
+
+    def __init__(self):
+        self.histograms = {}
+        self._counters = {}  # name -> callable returning the running total
+        self._lock = threading.Lock()
+
+    def add_counter(self, name, read):
+        """Reports read() as a running total, e.g. audio lost by the capture stage."""
+        self._counters[name] = read
+
+    def counters(self):
+        return {name: read() for name, read in sorted(self._counters.items())}
+
+    def observe(self, stage, seconds):
+        with self._lock:
+            histogram = self.histograms.get(stage)
+            if histogram is None:
+                histogram = self.histograms[stage] = Histogram()
+            histogram.observe(seconds)
+
+    @contextmanager
+    def span(self, stage):
+        """Times the enclosed block into stage."""
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.monotonic() - start)
+
+    def snapshot(self):
+        """Count, mean and p50/p95/p99 (seconds) per stage."""
+        with self._lock:
+            return {
+                stage: {
+                    "count": h.count,
+                    "mean": h.sum / h.count if h.count else None,
+                    "p50": h.percentile(50),
+                    "p95": h.percentile(95),
+                    "p99": h.percentile(99),
+                }
+                for stage, h in sorted(self.histograms.items())
+            }
+
+    def prometheus(self):
+        """Histograms in the Prometheus text exposition format."""
+        lines = [
+            "# HELP jarvis_stage_seconds Latency of each voice pipeline stage.",
+            "# TYPE jarvis_stage_seconds histogram",
+        ]
+        with self._lock:
+            for stage, h in sorted(self.histograms.items()):
+                for bound, count in zip(h.buckets, h.counts):
+                    lines.append(
+                        f'jarvis_stage_seconds_bucket{{stage="{stage}",le="{bound}"}} {count}'
+                    )
+                lines.append(
+                    f'jarvis_stage_seconds_bucket{{stage="{stage}",le="+Inf"}} {h.count}'
+                )
+                lines.append(f'jarvis_stage_seconds_sum{{stage="{stage}"}} {h.sum}')
+                lines.append(f'jarvis_stage_seconds_count{{stage="{stage}"}} {h.count}')
+        for name, value in self.counters().items():
+            lines.append(f"# TYPE jarvis_{name}_total counter")
+            lines.append(f"jarvis_{name}_total {value}")
+        return "\n".join(lines) + "\n"
+
+    def log_line(self):
+        parts = []
+        for stage, s in self.snapshot().items():
+            if s["count"]:
+                parts.append(
+                    f"{stage} p50={s['p50'] * 1000:.0f}ms p95={s['p95'] * 1000:.0f}ms"
+                )
+        line = "Latency: " + ("; ".join(parts) if parts else "no samples yet")
+        counters = self.counters()
+        if counters:
+            line += " | " + ", ".join(f"{k}={v}" for k, v in counters.items())
+        return line
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        metrics = self.server.metrics
+        if self.path.startswith("/metrics.json"):
+            body = json.dumps(
+                {"stages": metrics.snapshot(), "counters": metrics.counters()}
+            ).encode("utf-8")
+            content_type = "application/json"
+        elif self.path.startswith("/metrics"):
+            body = metrics.prometheus().encode("utf-8")
+            content_type = "text/plain; version=0.0.4"
+        else:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def serve_metrics(metrics, port=METRICS_PORT, host="127.0.0.1"):
+    """Serves /metrics (Prometheus text) and /metrics.json on a background thread."""
+    httpd = ThreadingHTTPServer((host, port), _MetricsHandler)
+    httpd.daemon_threads = True
+    httpd.metrics = metrics
+    threading.Thread(target=httpd.serve_forever, name="metrics", daemon=True).start()
+    return httpd
+
+
+def start_log_reporter(metrics, interval=LOG_INTERVAL):
+    """Prints a latency summary line every interval seconds; returns the stop event."""
+    stop = threading.Event()
+
+    def run():
+        while not stop.wait(interval):
+            print(metrics.log_line())
+
+    threading.Thread(target=run, name="metrics-log", daemon=True).start()
+    return stop
@@ -0,0 +1,245 @@
+"""Stand-in for LM Studio's OpenAI-compatible API, for offline benchmarks and tests.
+
+Run it in place of LM Studio:
+
+    python mock_llm_server.py --port 1234 --ttft 0.4 --tps 25 --error-rate 0.05
+"""
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_ANSWER = (
+    "That is outside my current briefing, but I would wager it is less interesting "
+    "than whatever Mr. Stark is building. Anything else?"
+)
+CANNED_ANSWERS = {
+    "tony stark": "Tony Stark is a genius inventor and the man inside the Iron Man suit. He also signs my paychecks, figuratively speaking.",
+    "speed of light": "The speed of light in a vacuum is about 299,792 kilometres per second. Faster than any of your excuses.",
+}
+
+
+class MockLLM:
+    """Answer selection and timing model shared by all request handlers."""
+
+    def __init__(
+        self,
+        ttft=0.3,
+        tokens_per_sec=20.0,
+        error_rate=0.0,
+        answers=None,
+        default_answer=DEFAULT_ANSWER,
+        seed=None,
+    ):
+        self.ttft = ttft  # Seconds before the first token (prompt processing)
+        self.tokens_per_sec = tokens_per_sec
+        self.error_rate = error_rate  # Share of completions failing with HTTP 500
+        self.answers = CANNED_ANSWERS if answers is None else answers
+        self.default_answer = default_answer
+        self.requests = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def should_fail(self):
+        with self._lock:
+            self.requests += 1
+            return self._random.random() < self.error_rate
+
+    def answer(self, messages):
+        """Picks the canned answer whose key appears in the last user message."""
+        user = next(
+            (
+                m.get("content", "")
+                for m in reversed(messages)
+                if m.get("role") == "user"
+            ),
+            "",
+        ).lower()
+        for key, answer in self.answers.items():
+            if key in user:
+                return answer
+        return self.default_answer
+
+    @staticmethod
+    def tokenize(text):
+        return re.findall(r"\S+\s*", text)
+
+
+class MockLLMHandler(BaseHTTPRequestHandler):
+    server_version = "MockLLM/1.0"
+
+    def log_message(self, format, *args):
+        pass  # Keep benchmark output clean
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path.rstrip("/") == "/v1/models":
+            self._send_json(
+                200,
+                {"object": "list", "data": [{"id": "local-model", "object": "model"}]},
+            )
+        else:
+            self._send_json(404, {"error": {"message": f"Unknown path {self.path}"}})
+
+    def do_POST(self):
+        if self.path.rstrip("/") != "/v1/chat/completions":
+            self._send_json(404, {"error": {"message": f"Unknown path {self.path}"}})
+            return
+
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+        llm = self.server.llm
+
+        if llm.should_fail():
+            self._send_json(500, {"error": {"message": "Injected failure"}})
+            return
+
+        messages = request.get("messages", [])
+        tokens = llm.tokenize(llm.answer(messages))
+        if request.get("max_tokens"):
+            tokens = tokens[: request["max_tokens"]]
+
+        prompt_tokens = sum(len(llm.tokenize(m.get("content", ""))) for m in messages)
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": len(tokens),
+            "total_tokens": prompt_tokens + len(tokens),
+        }
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+        created = int(time.time())
+
+        time.sleep(llm.ttft)
+        if request.get("stream"):
+            self._stream(completion_id, created, tokens, usage, request)
+            return
+
+        time.sleep(len(tokens) / llm.tokens_per_sec)
+        self._send_json(
+            200,
+            {
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": created,
+                "model": request.get("model", "local-model"),
+                "choices": [
+                    {
+                        "index": 0,
+                        "message": {"role": "assistant", "content": "".join(tokens)},
+                        "finish_reason": "stop",
+                    }
+                ],
+                "usage": usage,
+            },
+        )
+
+    def _stream(self, completion_id, created, tokens, usage, request):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+
+        def chunk(delta, finish_reason=None, with_usage=False):
+            payload = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": request.get("model", "local-model"),
+                "choices": [
+                    {"index": 0, "delta": delta, "finish_reason": finish_reason}
+                ],
+            }
+            if with_usage:
+                payload["choices"] = []
+                payload["usage"] = usage
+            self.wfile.write(f"data: {json.dumps(payload)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+
+        delay = 1.0 / self.server.llm.tokens_per_sec
+        try:
+            chunk({"role": "assistant", "content": ""})
+            for i, token in enumerate(tokens):
+                if i:
+                    time.sleep(delay)
+                chunk({"content": token})
+            chunk({}, finish_reason="stop")
+            if (request.get("stream_options") or {}).get("include_usage"):
+                chunk({}, with_usage=True)
+            self.wfile.write(b"data: [DONE]\n\n")
+            self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # Client cancelled the stream
+
+
+class MockLLMServer:
+    """Runs the mock API on a background thread; base_url is ready for OpenAI(base_url=...)."""
+
+    def __init__(self, llm=None, host="127.0.0.1", port=0):
+        self.httpd = ThreadingHTTPServer((host, port), MockLLMHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.llm = llm or MockLLM()
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self):
+        self._thread = threading.Thread(
+            target=self.httpd.serve_forever, name="mock-llm", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=1234)
+    parser.add_argument(
+        "--ttft", type=float, default=0.3, help="seconds to first token"
+    )
+    parser.add_argument("--tps", type=float, default=20.0, help="tokens per second")
+    parser.add_argument(
+        "--error-rate", type=float, default=0.0, help="share of HTTP 500s"
+    )
+    parser.add_argument(
+        "--answers", help="JSON file mapping query substrings to answers"
+    )
+    parser.add_argument("--seed", type=int, help="seed for error injection")
+    args = parser.parse_args()
+
+    answers = None
+    if args.answers:
+        with open(args.answers, encoding="utf-8") as f:
+            answers = json.load(f)
+
+    llm = MockLLM(args.ttft, args.tps, args.error_rate, answers, seed=args.seed)
+    server = MockLLMServer(llm, args.host, args.port)
+    print(f"Mock LLM listening on {server.base_url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+class PromptCacheStats:
+    """Tracks how much prompt prefill the server skipped thanks to its prefix/KV cache."""
+
+    def __init__(self):
+        self.requests = 0
+        self.prompt_tokens = 0
+        self.cached_tokens = 0
+        self.saved_ms = 0.0
+        self._ms_per_token = None  # Running prefill cost of an uncached token
+
+    @staticmethod
+    def _field(obj, name):
+        if obj is None:
+            return None
+        if isinstance(obj, dict):
+            return obj.get(name)
+        return getattr(obj, name, None)
+
+    def record(self, usage=None, timings=None):
+        """Records one completion from its OpenAI usage and/or llama.cpp timings; returns a log line."""
+        self.requests += 1
+
+        # llama.cpp: prompt_n tokens evaluated in prompt_ms, cache_n reused
+        prompt_n = self._field(timings, "prompt_n")
+        prompt_ms = self._field(timings, "prompt_ms")
+        cached = self._field(timings, "cache_n")
+
+        # OpenAI-style usage: prompt_tokens_details.cached_tokens
+        total = self._field(usage, "prompt_tokens")
+        if cached is None:
+            cached = self._field(
+                self._field(usage, "prompt_tokens_details"), "cached_tokens"
+            )
+        if total is None and prompt_n is not None:
+            total = prompt_n + (cached or 0)
+
+        if prompt_n and prompt_ms:
+            per_token = prompt_ms / prompt_n
+            self._ms_per_token = (
+                per_token
+                if self._ms_per_token is None
+                else 0.8 * self._ms_per_token + 0.2 * per_token
+            )
+
+        if total is None:
+            return "Prompt cache: no usage reported by the server"
+
+        cached = cached or 0
+        self.prompt_tokens += total
+        self.cached_tokens += cached
+        saved = cached * self._ms_per_token if self._ms_per_token else 0.0
+        self.saved_ms += saved
+        return (
+            f"Prompt cache: {cached}/{total} tokens reused, ~{saved / 1000:.2f}s prefill saved "
+            f"(session: {self.hit_rate:.0%} reused, ~{self.saved_ms / 1000:.1f}s saved)"
+        )
+
+    @property
+    def hit_rate(self):
+        return self.cached_tokens / self.prompt_tokens if self.prompt_tokens else 0.0
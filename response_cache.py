@@ -0,0 +1,139 @@
+import hashlib
+import re
+import threading
+import time
+from collections import OrderedDict
+
+MAX_ENTRIES = 256
+FACT_TTL = 24 * 3600.0  # Context-free answers ("who is tony stark")
+CONTEXT_TTL = 300.0  # Answers that depend on the conversation so far
+
+# Filler that does not change what is being asked
+FILLER_WORDS = {
+    "please",
+    "jarvis",
+    "hey",
+    "um",
+    "uh",
+    "so",
+    "the",
+    "a",
+    "an",
+}
+
+# Words that tie a question to the conversation so far
+CONTEXT_WORDS = {
+    "it",
+    "that",
+    "this",
+    "those",
+    "these",
+    "he",
+    "she",
+    "they",
+    "him",
+    "her",
+    "them",
+    "his",
+    "hers",
+    "their",
+    "again",
+    "more",
+    "else",
+    "also",
+    "why",
+    # The user and Jarvis themselves ("what is my name", "what did you say")
+    "i",
+    "me",
+    "my",
+    "mine",
+    "you",
+    "your",
+    "yours",
+    # Earlier turns ("what was your last answer", "what did i just ask")
+    "last",
+    "before",
+    "previous",
+    "just",
+    "earlier",
+}
+
+# Answers that go stale with the clock are never cached
+VOLATILE_WORDS = {
+    "today",
+    "now",
+    "tonight",
+    "tomorrow",
+    "yesterday",
+    "latest",
+    "weather",
+    "news",
+}
+
+
+def normalize_query(text):
+    """Lowercases, strips punctuation and filler so trivially different phrasings share a key."""
+    words = re.findall(r"[a-z0-9']+", text.lower())
+    return " ".join(w for w in words if w not in FILLER_WORDS)
+
+
+class ResponseCache:
+    """Bounded LRU cache of LLM answers with per-entry TTLs and hit/miss counters."""
+
+    def __init__(self, max_entries=MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # key -> (expires_at, response)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def context_fingerprint(query, context):
+        """Empty for self-contained queries; otherwise a hash of the conversation context."""
+        if not CONTEXT_WORDS.intersection(query.split()):
+            return ""
+        return hashlib.sha1(context.encode("utf-8")).hexdigest()[:16]
+
+    def key(self, text, context):
+        """Returns (key, ttl) for a query, or (None, 0) if it must not be cached."""
+        query = normalize_query(text)
+        if not query or VOLATILE_WORDS.intersection(query.split()):
+            return None, 0
+        fingerprint = self.context_fingerprint(query, context)
+        return f"{fingerprint}|{query}", CONTEXT_TTL if fingerprint else FACT_TTL
+
+    def get(self, key):
+        if key is None:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def __contains__(self, key):
+        """True for a live entry; unlike get(), not counted as a hit or miss."""
+        if key is None:
+            return False
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and entry[0] >= time.monotonic()
+
+    def put(self, key, response, ttl):
+        if key is None or ttl <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, response)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self):
+        total = self.hits + self.misses
+        rate = self.hits / total if total else 0.0
+        return f"{self.hits} hits / {self.misses} misses ({rate:.0%})"
@@ -0,0 +1,24 @@
+import re
+
+# Sentence end: terminal punctuation, optional closing quotes/brackets, then whitespace
+SENTENCE_END = re.compile(r"[.!?]+[\"')\]]*\s+")
+MIN_SENTENCE_CHARS = 12  # Avoids cutting after "Dr." or a lone "No."
+
+
+def iter_sentences(chunks):
+    """Regroups streamed text chunks into complete sentences as soon as each one ends."""
+    buf = ""
+    for chunk in chunks:
+        buf += chunk
+        while True:
+            match = SENTENCE_END.search(buf, MIN_SENTENCE_CHARS - 1)
+            if match is None:
+                break
+            sentence = buf[: match.end()].strip()
+            buf = buf[match.end() :]
+            if sentence:
+                yield sentence
+
+    # Whatever is left when the stream ends is the last sentence
+    if buf.strip():
+        yield buf.strip()
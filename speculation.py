@@ -0,0 +1,102 @@
+import queue
+import threading
+import time
+
+
+class Speculation(threading.Thread):
+    """One LLM answer streamed ahead of time; sentences wait here until adopted."""
+
+    def __init__(self, conversation, text):
+        super().__init__(name="llm-speculation", daemon=True)
+        self.conversation = conversation
+        self.text = text
+        # Taken when the request starts; the final transcript must match it
+        self.key = conversation.prompt_key(text)
+        self.started_at = time.monotonic()
+        self.answer = None  # Full answer once it streamed to the end
+        self._sentences = queue.Queue()
+        # Set to stop streaming; the LLM stage also sets it on barge-in
+        self.cancelled = threading.Event()
+
+    def run(self):
+        answer = self.conversation.stream_answer(self.text, cancelled=self.cancelled)
+        try:
+            while not self.cancelled.is_set():
+                try:
+                    self._sentences.put(next(answer))
+                except StopIteration as done:
+                    self.answer = done.value
+                    break
+        finally:
+            answer.close()
+            self._sentences.put(None)
+
+    def cancel(self):
+        self.cancelled.set()
+
+    def sentences(self):
+        """Yields the answer's sentences, blocking until each one has streamed."""
+        while True:
+            sentence = self._sentences.get()
+            if sentence is None:
+                return
+            yield sentence
+
+
+class Speculator:
+    """Starts LLM requests from stable partial transcripts and keeps hit/waste counts.
+
+    At most one speculation is in flight. The LLM stage takes it if the final
+    transcript would produce the same request; anything else cancels it.
+    """
+
+    def __init__(self, conversation):
+        self.conversation = conversation
+        self.started = 0
+        self.hits = 0
+        self.wasted = 0
+        self.saved_seconds = 0.0  # Head start of adopted speculations
+        self._current = None
+
+    @property
+    def active(self):
+        return self._current is not None
+
+    def start(self, text):
+        """Speculatively asks the LLM about text, replacing any other speculation."""
+        if self._current is not None:
+            if self._current.key == self.conversation.prompt_key(text):
+                return
+            self.discard()
+        self._current = Speculation(self.conversation, text)
+        self._current.start()
+        self.started += 1
+
+    def take(self, text):
+        """Returns the in-flight speculation if it answers text, else discards it and returns None."""
+        speculation = self._current
+        if speculation is None:
+            return None
+        if speculation.key != self.conversation.prompt_key(text):
+            self.discard()
+            return None
+        self._current = None
+        self.hits += 1
+        self.saved_seconds += time.monotonic() - speculation.started_at
+        return speculation
+
+    def discard(self):
+        """Cancels the in-flight speculation, if any, and counts it as wasted."""
+        if self._current is None:
+            return
+        self._current.cancel()
+        self._current = None
+        self.wasted += 1
+
+    def stats(self):
+        total = self.hits + self.wasted
+        rate = self.hits / total if total else 0.0
+        return (
+            f"{self.hits} hits / {self.wasted} wasted ({rate:.0%}), "
+            f"{self.saved_seconds:.1f}s head start"
+        )
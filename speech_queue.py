@@ -0,0 +1,181 @@
+import asyncio
+import functools
+import time
+from concurrent.futures import ThreadPoolExecutor
+from audio_playback import decode_audio
+
+ECHO_TAIL = 0.5  # Seconds after playback that the microphone may still pick it up
+
+
+class SpeechQueue:
+    """Synthesis and playback stages of the pipeline; sentence N+1 synthesizes while N plays."""
+
+    def __init__(self, backend, player, metrics=None):
+        self.backend = backend
+        self.player = player
+        self.metrics = metrics  # Optional Metrics timing synthesis and playback
+        # Blocking TTS and audio output run off the event loop, one worker each
+        self._synth_executor = ThreadPoolExecutor(1, thread_name_prefix="tts-synth")
+        self._play_executor = ThreadPoolExecutor(1, thread_name_prefix="tts-play")
+        self._loop = None
+        self._texts = None  # asyncio queues, created on the running loop by start()
+        self._audio = None
+        self._idle = None
+        self._generation = 0  # Bumped by cancel(); older items are dropped
+        self._pending = 0  # Sentences queued but not yet played or dropped
+        self._playing = None  # Text of the sentence being played
+        self._echo = None  # ... or of the last one, until _echo_until
+        self._echo_until = 0.0
+
+    @property
+    def busy(self):
+        return self._pending > 0
+
+    @property
+    def now_playing(self):
+        """Text whose audio may be reaching the microphone right now, else None.
+
+        Covers the sentence being played plus ECHO_TAIL seconds after it, for
+        room echo and output latency. Read it on the event loop.
+        """
+        if self._playing is not None:
+            return self._playing
+        if time.monotonic() < self._echo_until:
+            return self._echo
+        return None
+
+    def start(self):
+        """Starts the synthesis and playback stages on the running loop; returns their tasks."""
+        self._loop = asyncio.get_running_loop()
+        self._texts = asyncio.Queue()
+        # Room for one synthesized sentence waiting behind the one playing
+        self._audio = asyncio.Queue(maxsize=1)
+        self._idle = asyncio.Event()
+        self._idle.set()
+        return [
+            asyncio.create_task(self._synth_stage(), name="tts-synth"),
+            asyncio.create_task(self._play_stage(), name="tts-play"),
+        ]
+
+    def say(self, text, heard_at=None):
+        """Queues text for synthesis and playback; returns immediately.
+
+        heard_at is the monotonic time the user stopped speaking (the last
+        voiced chunk); when given, the delay until this text starts playing is
+        recorded as voice_to_voice.
+        Returns a future that becomes True once the text has played to the end,
+        or False if it was dropped or cut off. Must be called on the event loop.
+        """
+        played = self._loop.create_future()
+        self._pending += 1
+        self._idle.clear()
+        self._texts.put_nowait((self._generation, text, heard_at, played))
+        return played
+
+    def prefetch(self, text):
+        """Synthesizes text on the synthesis worker without playing it.
+
+        Only useful with a caching backend; runs in turn with queued speech, so
+        engines that can't synthesize twice at once are safe. Callable from any
+        thread.
+        """
+
+        def synthesize():
+            try:
+                self.backend.synthesize(text)
+            except Exception as e:
+                print(f"TTS Error ({self.backend.name}): {e}. Not prefetched.")
+
+        self._synth_executor.submit(synthesize)
+
+    def cancel(self):
+        """Drops everything queued and cuts off the sentence currently playing."""
+        self._generation += 1
+        for q in (self._texts, self._audio):
+            while True:
+                try:
+                    item = q.get_nowait()
+                except asyncio.QueueEmpty:
+                    break
+                self._done(item[-1], False)
+
+    def interrupt(self):
+        """Barge-in from any thread: cancels speech if any is in progress; returns whether it did."""
+        if not self.busy:
+            return False
+        self._loop.call_soon_threadsafe(self.cancel)
+        return True
+
+    async def wait(self):
+        """Waits until everything queued so far has been spoken or dropped."""
+        await self._idle.wait()
+
+    def close(self):
+        self._synth_executor.shutdown(wait=False)
+        self._play_executor.shutdown(wait=False)
+
+    def _observe(self, stage, seconds):
+        if self.metrics is not None:
+            self.metrics.observe(stage, seconds)
+
+    def _check_idle(self):
+        if self._pending <= 0:
+            self._idle.set()
+
+    def _done(self, played, result):
+        if not played.done():
+            played.set_result(result)
+        self._pending -= 1
+        self._check_idle()
+
+    def _synthesize(self, text):
+        return decode_audio(self.backend.synthesize(text), self.backend.audio_format)
+
+    async def _synth_stage(self):
+        while True:
+            generation, text, heard_at, played = await self._texts.get()
+            if generation != self._generation:
+                self._done(played, False)
+                continue
+            start = time.monotonic()
+            try:
+                audio = await self._loop.run_in_executor(
+                    self._synth_executor, self._synthesize, text
+                )
+            except Exception as e:
+                print(f"TTS Error ({self.backend.name}): {e}. Skipping speech.")
+                self._done(played, False)
+                continue
+            self._observe("tts_synthesis", time.monotonic() - start)
+            if generation != self._generation:
+                self._done(played, False)  # Cancelled while it was being synthesized
+                continue
+            # Waits while one is already buffered
+            await self._audio.put((generation, text, audio, heard_at, played))
+
+    async def _play_stage(self):
+        while True:
+            generation, text, audio, heard_at, played = await self._audio.get()
+            finished = False
+            try:
+                if generation == self._generation:
+                    start = time.monotonic()
+                    self._playing = text
+                    if heard_at is not None:
+                        self._observe("voice_to_voice", start - heard_at)
+                    finished = await self._loop.run_in_executor(
+                        self._play_executor,
+                        functools.partial(
+                            self.player.play,
+                            audio,
+                            interrupted=lambda: generation != self._generation,
+                        ),
+                    )
+                    self._observe("playback", time.monotonic() - start)
+            except Exception as e:
+                print(f"Playback Error: {e}. Skipping speech.")
+            finally:
+                if self._playing is not None:
+                    self._echo, self._playing = self._playing, None
+                    self._echo_until = time.monotonic() + ECHO_TAIL
+                self._done(played, finished)
@@ -0,0 +1,144 @@
+import io
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+
+try:
+    import pyttsx3  # Offline engine (SAPI5 / NSSpeechSynthesizer / espeak)
+except ImportError:
+    pyttsx3 = None
+
+try:
+    from gtts import gTTS  # Online Google TTS, kept as an optional backend
+except ImportError:
+    gTTS = None
+
+# Backends tried in order until one is available
+TTS_BACKENDS = ["pyttsx3", "espeak", "gtts"]
+SPEECH_RATE = 175  # Words per minute for the offline engines
+
+
+class TTSBackend:
+    """Speech synthesis engine: turns text into encoded audio bytes."""
+
+    name = "base"
+    audio_format = "wav"  # File extension of the bytes synthesize() returns
+
+    def __init__(self, voice=""):
+        self.voice = voice
+
+    @classmethod
+    def available(cls):
+        return False
+
+    def synthesize(self, text):
+        raise NotImplementedError
+
+
+class Pyttsx3Backend(TTSBackend):
+    """Offline synthesis through the platform speech engine via pyttsx3."""
+
+    name = "pyttsx3"
+    # The macOS (nsss) driver writes AIFF whatever the file is called
+    audio_format = "aiff" if sys.platform == "darwin" else "wav"
+
+    def __init__(self, voice=""):
+        super().__init__(voice)
+        # pyttsx3.init() hands every thread the same engine per driver, and its
+        # run loop can't be entered twice; one synthesis at a time
+        self._lock = threading.Lock()
+        self._engine = pyttsx3.init()
+        self._engine.setProperty("rate", SPEECH_RATE)
+        if self.voice:
+            self._engine.setProperty("voice", self.voice)
+
+    @classmethod
+    def available(cls):
+        if pyttsx3 is None:
+            return False
+        # AIFF is decoded for playback by the ffmpeg executable
+        return cls.audio_format == "wav" or bool(shutil.which("ffmpeg"))
+
+    def synthesize(self, text):
+        fd, path = tempfile.mkstemp(suffix=f".{self.audio_format}")
+        os.close(fd)
+        try:
+            with self._lock:
+                self._engine.save_to_file(text, path)
+                self._engine.runAndWait()
+            with open(path, "rb") as f:
+                return f.read()
+        finally:
+            os.remove(path)
+
+
+class EspeakBackend(TTSBackend):
+    """Offline synthesis by piping WAV out of the espeak-ng command line tool."""
+
+    name = "espeak"
+
+    def __init__(self, voice="en"):
+        super().__init__(voice or "en")
+        self.executable = shutil.which("espeak-ng") or shutil.which("espeak")
+
+    @classmethod
+    def available(cls):
+        return bool(shutil.which("espeak-ng") or shutil.which("espeak"))
+
+    def synthesize(self, text):
+        # Text goes in on stdin so a leading "-" is never parsed as an option
+        return subprocess.run(
+            [
+                self.executable,
+                "-v",
+                self.voice,
+                "-s",
+                str(SPEECH_RATE),
+                "--stdout",
+                "--stdin",
+            ],
+            input=text.encode("utf-8"),
+            capture_output=True,
+            check=True,
+        ).stdout
+
+
+class GTTSBackend(TTSBackend):
+    """Google TTS over the network; needs internet for every phrase."""
+
+    name = "gtts"
+    audio_format = "mp3"
+
+    def __init__(self, voice="en"):
+        super().__init__(voice or "en")
+
+    @classmethod
+    def available(cls):
+        # Its MP3 output is decoded for playback by the ffmpeg executable
+        return gTTS is not None and bool(shutil.which("ffmpeg"))
+
+    def synthesize(self, text):
+        buf = io.BytesIO()
+        gTTS(text=text, lang=self.voice, slow=False).write_to_fp(buf)
+        return buf.getvalue()
+
+
+BACKENDS = {
+    backend.name: backend for backend in (Pyttsx3Backend, EspeakBackend, GTTSBackend)
+}
+
+
+def create_backend(names=TTS_BACKENDS, voice=""):
+    """Returns the first backend in names that is installed and starts up."""
+    for name in names:
+        backend = BACKENDS[name]
+        if not backend.available():
+            continue
+        try:
+            return backend(voice)
+        except Exception as e:
+            print(f"TTS backend '{name}' failed to start: {e}")
+    raise RuntimeError(f"No TTS backend available (tried {', '.join(names)})")
@@ -0,0 +1,108 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+CACHE_DIR = "tts_cache"
+MAX_CACHE_BYTES = 64 * 1024 * 1024  # Least recently used files go first past this
+
+
+class AudioCache:
+    """Content-addressed on-disk store of synthesized audio with LRU eviction."""
+
+    def __init__(self, directory=CACHE_DIR, max_bytes=MAX_CACHE_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # filename -> size, least recently used first
+        self._total = 0
+
+        os.makedirs(directory, exist_ok=True)
+        # Rebuild recency order from access times left by previous runs
+        files = []
+        for entry in os.scandir(directory):
+            if entry.is_file() and not entry.name.endswith(".tmp"):
+                stat = entry.stat()
+                files.append((stat.st_mtime, entry.name, stat.st_size))
+        for _, name, size in sorted(files):
+            self._entries[name] = size
+            self._total += size
+        # A smaller limit than last run's takes effect straight away
+        self._evict()
+
+    @staticmethod
+    def key(text, voice, backend, audio_format):
+        digest = hashlib.sha256(
+            f"{backend}\0{voice}\0{text}".encode("utf-8")
+        ).hexdigest()
+        return f"{digest}.{audio_format}"
+
+    def get(self, key):
+        """Returns cached audio bytes for key, or None."""
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return None
+            path = os.path.join(self.directory, key)
+            try:
+                with open(path, "rb") as f:
+                    audio = f.read()
+            except OSError:
+                self._total -= self._entries.pop(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            os.utime(path)  # Persist recency across restarts
+            self.hits += 1
+            return audio
+
+    def put(self, key, audio):
+        with self._lock:
+            path = os.path.join(self.directory, key)
+            tmp_path = path + ".tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(audio)
+            os.replace(tmp_path, path)
+
+            self._total -= self._entries.pop(key, 0)
+            self._entries[key] = len(audio)
+            self._total += len(audio)
+            self._evict()
+
+    def stats(self):
+        total = self.hits + self.misses
+        rate = self.hits / total if total else 0.0
+        return (
+            f"{self.hits} hits / {self.misses} misses ({rate:.0%}), "
+            f"{self._total / 2**20:.1f} MB on disk"
+        )
+
+    def _evict(self):
+        while self._total > self.max_bytes and len(self._entries) > 1:
+            name, size = self._entries.popitem(last=False)
+            self._total -= size
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except OSError:
+                pass
+
+
+class CachedBackend:
+    """Wraps a TTS backend so repeated phrases are served from an AudioCache."""
+
+    def __init__(self, backend, cache):
+        self.backend = backend
+        self.cache = cache
+        self.name = backend.name
+        self.audio_format = backend.audio_format
+        self.voice = backend.voice
+
+    def synthesize(self, text):
+        key = AudioCache.key(text, self.voice, self.name, self.audio_format)
+        audio = self.cache.get(key)
+        if audio is None:
+            audio = self.backend.synthesize(text)
+            self.cache.put(key, audio)
+        return audio
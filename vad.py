@@ -0,0 +1,97 @@
+from collections import deque
+import numpy as np  # Vectorized frame analysis over int16 audio
+
+SAMPLE_RATE = 16000
+FRAME_MS = 20  # Analysis frame inside each capture chunk
+THRESHOLD_DB = 9.0  # Frame energy above the noise floor that counts as voiced
+MIN_SPEECH_FRAMES = 3  # Voiced frames needed in a chunk to open the gate
+MIN_BAND_RATIO = 0.5  # Share of frame energy that must fall in the speech band
+SPEECH_BAND_HZ = (300, 3400)
+HANGOVER_CHUNKS = 3  # Chunks forwarded after speech stops (750 ms at 250 ms chunks)
+PREROLL_CHUNKS = 1  # Chunks replayed on onset so the first syllable is not lost
+FLOOR_RISE = 0.05  # Noise floor adaptation rate when the room gets louder
+FLOOR_FALL = 0.5  # ... and when it gets quieter
+
+
+class VoiceActivityDetector:
+    """Energy/spectral speech gate with an adaptive noise floor and hangover."""
+
+    def __init__(
+        self,
+        rate=SAMPLE_RATE,
+        frame_ms=FRAME_MS,
+        threshold_db=THRESHOLD_DB,
+        hangover_chunks=HANGOVER_CHUNKS,
+        preroll_chunks=PREROLL_CHUNKS,
+    ):
+        self.frame_len = rate * frame_ms // 1000
+        self.threshold_db = threshold_db
+        self.hangover_chunks = hangover_chunks
+        self.noise_floor_db = None  # Seeded from the first chunk
+        self.level_db = -100.0  # Speech level of the last chunk analysed
+        self.speech_chunks = 0  # Voiced chunks seen so far
+
+        self._window = np.hanning(self.frame_len).astype(np.float32)
+        freqs = np.fft.rfftfreq(self.frame_len, 1.0 / rate)
+        self._band = (freqs >= SPEECH_BAND_HZ[0]) & (freqs <= SPEECH_BAND_HZ[1])
+        self._preroll = deque(maxlen=preroll_chunks)
+        self._hangover = 0
+        self._active = False
+
+    def _voiced_frames(self, chunk):
+        samples = np.frombuffer(chunk, dtype=np.int16).astype(np.float32)
+        n_frames = len(samples) // self.frame_len
+        if n_frames == 0:
+            return 0
+
+        frames = samples[: n_frames * self.frame_len].reshape(n_frames, self.frame_len)
+        energy_db = 10.0 * np.log10(np.mean(frames * frames, axis=1) + 1e-10)
+
+        spectrum = np.abs(np.fft.rfft(frames * self._window, axis=1)) ** 2
+        band_ratio = spectrum[:, self._band].sum(axis=1) / (
+            spectrum.sum(axis=1) + 1e-10
+        )
+
+        # Track the floor from the quietest frames; fall fast, rise slowly
+        chunk_floor = float(np.percentile(energy_db, 10))
+        if self.noise_floor_db is None:
+            self.noise_floor_db = chunk_floor
+        else:
+            rate = FLOOR_FALL if chunk_floor < self.noise_floor_db else FLOOR_RISE
+            self.noise_floor_db += rate * (chunk_floor - self.noise_floor_db)
+
+        # Loud end of the chunk, so pauses between words don't drag it down
+        self.level_db = float(np.percentile(energy_db, 90))
+
+        voiced = (energy_db > self.noise_floor_db + self.threshold_db) & (
+            band_ratio > MIN_BAND_RATIO
+        )
+        return int(np.count_nonzero(voiced))
+
+    def process(self, chunk):
+        """Returns (chunks to forward to the recognizer, whether a speech segment just ended)."""
+        if self._voiced_frames(chunk) >= MIN_SPEECH_FRAMES:
+            self.speech_chunks += 1
+            self._hangover = self.hangover_chunks
+            if not self._active:
+                self._active = True
+                forward = list(self._preroll) + [chunk]
+                self._preroll.clear()
+                return forward, False
+            return [chunk], False
+
+        if self._active:
+            if self._hangover > 0:
+                self._hangover -= 1
+                return [chunk], False
+            self._active = False
+            self._preroll.append(chunk)
+            return [], True
+
+        self._preroll.append(chunk)
+        return [], False
+
+    @property
+    def active(self):
+        """True while the gate is open (speech or hangover)."""
+        return self._active